@@ -0,0 +1,100 @@
+# mixer.py
+"""
+Benchmark for the VC cog's soundboard mixer.
+
+Mixes synthetic PCM layers with vc.Mixer and reports how long building
+one 20 ms frame takes at each layer count, against Discord's 20 ms frame
+deadline. No voice connection, FFmpeg or sound files are needed.
+
+Run from the repository root: python -m bench.mixer [options]
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+import discord
+import numpy as np
+
+# discord.py tasks bind to the event loop current at import time
+asyncio.set_event_loop(asyncio.new_event_loop())
+
+import cogs.vc as vc
+
+FRAME_MS = 20
+
+class ToneSource(discord.AudioSource):
+    """Endless PCM source cycling through pre-generated noise frames."""
+    def __init__(self, seed, frames=50):
+        rng = np.random.default_rng(seed)
+        pcm = rng.integers(-12000, 12000, vc.Mixer.SAMPLES * frames,
+                           dtype=np.int16)
+        size = discord.opus.Encoder.FRAME_SIZE
+        data = pcm.tobytes()
+        self.frames = [data[i:i + size] for i in range(0, len(data), size)]
+        self.position = 0
+
+    def read(self):
+        self.position += 1
+        return self.frames[self.position % len(self.frames)]
+
+def time_frames(layers, frames):
+    """
+    Accepts layer count and number of frames to build.
+    Returns list of frame build times in ms.
+    """
+    vc.MIXER_LAYERS = max(vc.MIXER_LAYERS, layers)
+    mixer = vc.Mixer()
+
+    for i in range(layers):
+        mixer.add(ToneSource(i), 0.5 + i % 3 * 0.25)
+
+    for _ in range(50): # warm up
+        mixer.read()
+
+    samples = []
+
+    for _ in range(frames):
+        start = time.perf_counter()
+        mixer.read()
+        samples.append((time.perf_counter() - start) * 1000)
+
+    return samples
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--layers', default='1,2,4,8,16,32,64',
+                        help='comma-separated layer counts')
+    parser.add_argument('--frames', type=int, default=2000,
+                        help='frames built per layer count')
+    parser.add_argument('--json', metavar='PATH',
+                        help='also write results as JSON')
+    args = parser.parse_args()
+    results = []
+
+    for layers in [int(n) for n in args.layers.split(',')]:
+        ordered = sorted(time_frames(layers, args.frames))
+        results.append({
+            'layers': layers,
+            'mean': statistics.fmean(ordered),
+            'p50': ordered[len(ordered) // 2],
+            'p99': ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))],
+            'max': ordered[-1]})
+
+    print(f"{'layers':>6} {'mean':>8} {'p50':>8} {'p99':>8} {'max':>8} "
+          f"{'budget':>7}")
+
+    for r in results:
+        print(f"{r['layers']:>6} {r['mean']:8.3f} {r['p50']:8.3f} "
+              f"{r['p99']:8.3f} {r['max']:8.3f} "
+              f"{r['p99'] / FRAME_MS:7.1%}")
+
+    print(f"(ms per frame; budget is p99 as a share of {FRAME_MS} ms)")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'frames': args.frames, 'results': results}, f,
+                      indent=1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,275 @@
+# weather.py
+"""
+Offline benchmark for the weather cog.
+
+Serves the One Call and Bing Maps responses in bench/fixtures from a local
+stub server with optional simulated latency, then drives Weather.forecast
+at several concurrency levels. Reports end-to-end latency and per-stage
+latency (geocode, fetch, render) so regressions show up before deploying.
+No API tokens or network access are needed.
+
+Run from the repository root: python -m bench.weather [options]
+"""
+import os
+import argparse
+import asyncio
+import functools
+import json
+import statistics
+import threading
+import time
+import types
+import zlib
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# keep the benchmark away from the real database and provider quotas
+os.environ.setdefault('WEATHER_DB', ':memory:')
+os.environ.setdefault('OWM_TOKEN', 'bench')
+os.environ.setdefault('BING_MAPS_TOKEN', 'bench')
+os.environ.setdefault('OWM_CALLS_PER_MINUTE', '1000000')
+os.environ.setdefault('OWM_BURST', '1000000')
+os.environ.setdefault('BING_CALLS_PER_MINUTE', '1000000')
+os.environ.setdefault('BING_BURST', '1000000')
+
+# discord.py tasks bind to the event loop current at import time
+loop = asyncio.new_event_loop()
+asyncio.set_event_loop(loop)
+
+import cogs.weather as weather
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures')
+MODES = ['-now', '-12h', '-tmrw', '-7d']
+BUILDERS = ['current_weather_embed', 'hourly_forecast_embed',
+            'tomorrow_forecast_embed', 'daily_forecast_embed']
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES, name)) as f:
+        return json.load(f)
+
+class StubHandler(BaseHTTPRequestHandler):
+    """
+    Answers Bing Maps Locations and OWM One Call requests with fixtures.
+    Each distinct place query geocodes to its own coordinates.
+    """
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    bing = load_fixture('bing.json')
+    onecall = load_fixture('onecall.json')
+    latency = 0 # s
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        time.sleep(self.latency)
+
+        if url.path.endswith('/Locations'):
+            body = self.locate(query.get('query', [''])[0])
+        elif url.path.endswith('/onecall'):
+            body = dict(self.onecall, lat=float(query['lat'][0]),
+                        lon=float(query['lon'][0]))
+        else:
+            self.send_error(404)
+            return
+
+        data = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def locate(self, place):
+        """
+        Accepts place query.
+        Returns Bing response with coordinates derived from the query.
+        """
+        doc = json.loads(json.dumps(self.bing))
+        resource = doc['resourceSets'][0]['resources'][0]
+        offset = zlib.crc32(place.encode()) % 10000 / 1000
+        lat, lon = resource['point']['coordinates']
+        resource['point']['coordinates'] = [lat + offset, lon + offset]
+        resource['name'] = place
+        resource['address']['formattedAddress'] = place
+
+        return doc
+
+    def log_message(self, *args):
+        pass
+
+class Ctx:
+    """Minimal command context that records sends and error reactions."""
+    def __init__(self):
+        self.sent = None
+        self.error = None
+        self.message = types.SimpleNamespace(add_reaction=self.react)
+
+    async def send(self, content=None, *, embed=None):
+        self.sent = embed or content
+
+    async def react(self, emoji):
+        self.error = emoji
+
+class Bot:
+    """Bot stand-in that is never ready, so background loops stay idle."""
+    async def wait_until_ready(self):
+        await asyncio.Event().wait()
+
+class Timings:
+    """Collects latency samples per stage."""
+    def __init__(self):
+        self.samples = {}
+
+    def add(self, stage, seconds):
+        self.samples.setdefault(stage, []).append(seconds * 1000)
+
+    def wrap_async(self, stage, func):
+        async def timed(*args, **kwargs):
+            start = time.perf_counter()
+
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                self.add(stage, time.perf_counter() - start)
+        return timed
+
+    def summary(self):
+        """Returns dict of stage to mean, p50, p95 and max in ms."""
+        summary = {}
+
+        for stage, samples in self.samples.items():
+            ordered = sorted(samples)
+            summary[stage] = {
+                'n': len(ordered),
+                'mean': statistics.fmean(ordered),
+                'p50': ordered[len(ordered) // 2],
+                'p95': ordered[min(len(ordered) - 1,
+                                   int(len(ordered) * 0.95))],
+                'max': ordered[-1]}
+
+        return summary
+
+def make_cog(port, timings):
+    """
+    Accepts stub server port and Timings.
+    Returns Weather cog pointed at the stub and instrumented per stage.
+    """
+    cog = weather.Weather(Bot())
+
+    for client in (cog.mgr.http_client, cog.mgr.one_call_http_client):
+        client.config['connection']['use_ssl'] = False
+        client.root_uri = f'127.0.0.1:{port}/data/3.0'
+        client.admits_subdomains = False
+
+    cog.geocoder.geocode_api = f'http://127.0.0.1:{port}/REST/v1/Locations'
+    cog.geocode = timings.wrap_async('geocode', cog.geocode)
+    cog.one_call = timings.wrap_async('fetch', cog.one_call)
+
+    return cog
+
+async def run_level(port, concurrency, requests, hot, active):
+    """
+    Accepts stub port, concurrency, request count, whether every request
+    asks for the same place and one-item list holding the active Timings.
+    Returns tuple of Timings, error count and wall time in seconds.
+    """
+    timings = Timings()
+    active[0] = timings
+    cog = make_cog(port, timings)
+    gate = asyncio.Semaphore(concurrency)
+    errors = 0
+
+    async def one(i):
+        nonlocal errors
+        ctx = Ctx()
+        place = 'Toronto, ON' if hot else f'Bench City {i}'
+
+        async with gate:
+            start = time.perf_counter()
+            await cog.forecast.callback(cog, ctx, MODES[i % len(MODES)],
+                                        place)
+            timings.add('end-to-end', time.perf_counter() - start)
+
+        if ctx.error or not ctx.sent:
+            errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    wall = time.perf_counter() - start
+    cog.cog_unload()
+
+    return timings, errors, wall
+
+def instrument_render(timings_ref):
+    """
+    Accepts one-item list holding the active Timings.
+    Wraps the embed builders so render time is recorded.
+    """
+    for name in BUILDERS:
+        func = getattr(weather, name)
+
+        @functools.wraps(func)
+        def timed(*args, _func=func, **kwargs):
+            start = time.perf_counter()
+
+            try:
+                return _func(*args, **kwargs)
+            finally:
+                timings_ref[0].add('render', time.perf_counter() - start)
+
+        setattr(weather, name, timed)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--latency', type=float, default=50,
+                        help='simulated upstream latency in ms')
+    parser.add_argument('--requests', type=int, default=200,
+                        help='requests per concurrency level')
+    parser.add_argument('--concurrency', default='1,10,50',
+                        help='comma-separated concurrency levels')
+    parser.add_argument('--json', metavar='PATH',
+                        help='also write results as JSON')
+    args = parser.parse_args()
+
+    StubHandler.latency = args.latency / 1000
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    active = [None]
+    instrument_render(active)
+    results = []
+
+    for hot in (False, True):
+        for level in [int(c) for c in args.concurrency.split(',')]:
+            timings, errors, wall = loop.run_until_complete(
+                run_level(server.server_port, level, args.requests, hot,
+                          active))
+            results.append({'places': 'same' if hot else 'distinct',
+                            'concurrency': level,
+                            'requests': args.requests,
+                            'errors': errors,
+                            'throughput': args.requests / wall,
+                            'stages': timings.summary()})
+
+    server.shutdown()
+
+    for r in results:
+        print(f"\n{r['places']} places, concurrency {r['concurrency']}: "
+              f"{r['throughput']:.1f} req/s, {r['errors']} errors")
+
+        for stage in ('end-to-end', 'geocode', 'fetch', 'render'):
+            s = r['stages'].get(stage)
+
+            if s:
+                print(f"  {stage:<11} n={s['n']:<5} mean={s['mean']:8.2f} "
+                      f"p50={s['p50']:8.2f} p95={s['p95']:8.2f} "
+                      f"max={s['max']:8.2f} ms")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'latency_ms': args.latency, 'results': results}, f,
+                      indent=1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+# weather_clients.py
+"""
+Compares per-request weather client setup against the Weather cog's
+long-lived clients.
+
+Measures client construction and HTTP connection reuse against a local
+server, so no API tokens or network access are needed.
+
+Run from the repository root: python -m bench.weather_clients
+"""
+import os
+import threading
+import time
+import dotenv
+import geopy, geopy.adapters, geopy.geocoders
+import pyowm, pyowm.utils.config
+import requests
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+N = 200
+
+class Handler(BaseHTTPRequestHandler):
+    """Answers every GET with a small JSON body over HTTP/1.1."""
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        body = b'{}'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+def per_call_setup():
+    """Builds clients the way get_obs_loc used to on every request."""
+    dotenv.load_dotenv()
+    owm = pyowm.OWM(os.getenv('OWM_TOKEN', ''))
+    mgr = owm.weather_manager()
+    geocoder = geopy.geocoders.Bing(os.getenv('BING_MAPS_TOKEN'))
+    return mgr, geocoder
+
+def long_lived_setup():
+    """Builds clients the way Weather.__init__ does once per cog."""
+    dotenv.load_dotenv()
+    owm_config = pyowm.utils.config.get_default_config()
+    owm_config['connection']['max_retries'] = 0
+    mgr = pyowm.OWM(os.getenv('OWM_TOKEN', ''), owm_config).weather_manager()
+    geocoder = geopy.geocoders.Bing(
+        os.getenv('BING_MAPS_TOKEN'),
+        adapter_factory=geopy.adapters.RequestsAdapter)
+    return mgr, geocoder
+
+def timed(func, n=N):
+    """
+    Accepts function and iteration count.
+    Returns mean time per call in milliseconds.
+    """
+    start = time.perf_counter()
+
+    for _ in range(n):
+        func()
+
+    return (time.perf_counter() - start) / n * 1000
+
+def main():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f'http://127.0.0.1:{server.server_port}/'
+
+    mgr, geocoder = long_lived_setup()
+    session = mgr.one_call_http_client.http
+
+    setup = timed(per_call_setup)
+    fresh = timed(lambda: requests.get(url))
+    pooled = timed(lambda: session.get(url))
+
+    print(f"Client construction per request: {setup:.3f} ms")
+    print(f"Request on new connection:       {fresh:.3f} ms")
+    print(f"Request on pooled connection:    {pooled:.3f} ms")
+    print(f"Saving per request (local, no TLS): "
+          f"{setup + fresh - pooled:.3f} ms")
+
+    server.shutdown()
+
+if __name__ == '__main__':
+    main()
@@ -1,14 +1,2083 @@
 # vc.py
 import os
+import asyncio
+import bisect
+import difflib
+import functools
+import io
+import json
+import re
+import shutil
+import struct
+import subprocess
+import threading
+import time
 import discord
+import numpy as np
 import youtube_dl
 
-from discord.ext import commands
+from array import array
+from collections import OrderedDict, deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from discord.ext import commands, tasks
+from discord.oggparse import OggError, OggStream
+
+# local sounds are indexed at startup and rescanned for changes
+SOUNDS_DIR = os.getenv('SOUNDS_DIR', 'sounds')
+SOUND_SCAN_INTERVAL = int(os.getenv('SOUND_SCAN_INTERVAL', 60)) # s
+
+# loudness of local sounds, measured once and evened out at playback
+LOUDNESS_INDEX = os.getenv('LOUDNESS_INDEX', 'cache/loudness.json')
+LOUDNESS_TARGET = float(os.getenv('LOUDNESS_TARGET', -16)) # LUFS
+LOUDNESS_PEAK = float(os.getenv('LOUDNESS_PEAK', -1)) # dBTP
+LOUDNESS_TOLERANCE = float(os.getenv('LOUDNESS_TOLERANCE', 1)) # dB
+
+# encoded frames of played sounds, shared by every guild
+FRAME_CACHE_BYTES = int(os.getenv('FRAME_CACHE_BYTES', 64 * 2**20)) # bytes
+FRAME_CACHE_SOUND_BYTES = int(os.getenv('FRAME_CACHE_SOUND_BYTES',
+                                        FRAME_CACHE_BYTES // 4)) # bytes
+
+# idle FFmpeg processes kept ready for each kind of local sound decode
+FFMPEG_WARM = int(os.getenv('FFMPEG_WARM', 2)) # processes
+
+# voice connections left idle are closed; dropped ones are retried
+VOICE_IDLE_TIMEOUT = int(os.getenv('VOICE_IDLE_TIMEOUT', 300)) # s
+VOICE_CONNECT_TIMEOUT = float(os.getenv('VOICE_CONNECT_TIMEOUT', 10)) # s
+VOICE_RECONNECT_ATTEMPTS = int(os.getenv('VOICE_RECONNECT_ATTEMPTS',
+                                         3)) # tries
+
+# playback telemetry kept per guild for $vcstats
+TELEMETRY_WINDOW = int(os.getenv('TELEMETRY_WINDOW', 3000)) # frames
+TELEMETRY_STALL = float(os.getenv('TELEMETRY_STALL', 0.2)) # s
+
+FRAME_LENGTH = discord.opus.Encoder.FRAME_LENGTH / 1000 # s
+
+# sounds mixed over the current one by $overlay
+MIXER_LAYERS = int(os.getenv('MIXER_LAYERS', 8)) # sounds
+
+# transcoded copies of played YouTube tracks, evicted least recently used
+YOUTUBE_CACHE_DIR = os.getenv('YOUTUBE_CACHE_DIR', 'cache/youtube')
+YOUTUBE_CACHE_BYTES = int(os.getenv('YOUTUBE_CACHE_BYTES', 2**30)) # bytes
+YOUTUBE_CACHE_MAX_LENGTH = int(os.getenv('YOUTUBE_CACHE_MAX_LENGTH',
+                                         900)) # s
+YOUTUBE_CACHE_JOBS = int(os.getenv('YOUTUBE_CACHE_JOBS', 2)) # transcodes
+
+# youtube_dl extraction runs off the event loop in a bounded pool
+YTDL_WORKERS = int(os.getenv('YTDL_WORKERS', 4)) # threads
+YTDL_QUEUE_DEPTH = int(os.getenv('YTDL_QUEUE_DEPTH', 8)) # lookups
+YTDL_TIMEOUT = float(os.getenv('YTDL_TIMEOUT', 20)) # s
+
+# resolved videos are reused until their stream URLs are about to expire
+EXTRACT_CACHE_SIZE = int(os.getenv('EXTRACT_CACHE_SIZE', 256)) # videos
+STREAM_TTL = int(os.getenv('STREAM_TTL', 3600)) # s, if URL has no expiry
+STREAM_EXPIRY_MARGIN = int(os.getenv('STREAM_EXPIRY_MARGIN', 600)) # s
+
+VIDEO_ID = re.compile(r'(?:youtu\.be/|youtube\.com/(?:watch\?(?:.*&)?v=|'
+                      r'shorts/|embed/))([\w-]{11})')
+EXPIRE = re.compile(r'[?&/]expire[=/](\d+)')
+LUFS = re.compile(r'I:\s+(-?[\d.]+|-inf) LUFS')
+PEAK = re.compile(r'Peak:\s+(-?[\d.]+|-inf) dBFS')
+
+YDL_OPTS = {'default_search': 'auto', 'format': 'bestaudio',
+            'noplaylist': 'True', 'quiet': True,
+            'socket_timeout': YTDL_TIMEOUT}
+FFMPEG_STREAM_OPTS = {'before_options': '-reconnect 1 -reconnect_streamed 1 '
+                      '-reconnect_delay_max 5',
+                      'options': '-vn'}
+
+class MixerFullError(Exception):
+    """Raised when MIXER_LAYERS sounds are already playing at once."""
+
+class ExtractorBusyError(Exception):
+    """Raised when too many YouTube lookups are already pending."""
+
+def extract(query):
+    """
+    Accepts YouTube URL or search terms.
+    Returns info dict of the video, or None if a search found nothing.
+
+    Blocks; run in the extractor pool.
+    """
+    # YoutubeDL instances aren't thread-safe, so each lookup gets its own
+    with youtube_dl.YoutubeDL(YDL_OPTS) as ydl:
+        info = ydl.extract_info(query, download=False)
+
+    if 'entries' in info:
+        entries = [e for e in info['entries'] if e]
+        return entries[0] if entries else None
+
+    return info
+
+def extract_playlist(query):
+    """
+    Accepts YouTube playlist URL.
+    Returns tuple of playlist title and iterator of its entries, or None
+    if the URL isn't a playlist.
+
+    Entries only hold IDs and titles, and are listed a page at a time as
+    the iterator is advanced, which blocks.
+    """
+    opts = dict(YDL_OPTS, noplaylist=False, extract_flat='in_playlist')
+
+    with youtube_dl.YoutubeDL(opts) as ydl:
+        info = ydl.extract_info(query, download=False, process=False)
+
+        # unprocessed results may point at the playlist rather than be it
+        while info.get('_type') in ('url', 'url_transparent'):
+            info = ydl.extract_info(info['url'], download=False,
+                                    ie_key=info.get('ie_key'), process=False)
+
+    if info.get('_type') != 'playlist':
+        return None
+
+    return info.get('title') or query, iter(info['entries'])
+
+def entry_url(entry):
+    """
+    Accepts flat playlist entry.
+    Returns URL to extract it from.
+    """
+    if '://' in entry.get('url', ''):
+        return entry['url']
+
+    return f"https://www.youtube.com/watch?v={entry['id']}"
+
+def query_key(query):
+    """
+    Accepts YouTube URL or search terms.
+    Returns cache key: the video ID for links, else normalized search terms.
+    """
+    match = VIDEO_ID.search(query)
+
+    if match:
+        return f'id:{match.group(1)}'
+
+    return ' '.join(query.casefold().split())
+
+def stream_expiry(info, created):
+    """
+    Accepts info dict and time it was extracted.
+    Returns Unix time its stream URL stops working.
+    """
+    match = EXPIRE.search(info['formats'][0]['url'])
+    return int(match.group(1)) if match else created + STREAM_TTL
+
+class ExtractCache:
+    """
+    LRU cache of extracted info dicts keyed by video ID.
+    Search terms and links map onto the video they resolved to.
+    Counts hits, misses and re-resolves of expired stream URLs.
+    """
+    def __init__(self, maxsize=EXTRACT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.videos = OrderedDict() # video ID: (expires, info)
+        self.queries = OrderedDict() # query key: video ID
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+
+    def __len__(self):
+        return len(self.videos)
+
+    def get(self, key):
+        """
+        Accepts query key.
+        Returns tuple of info dict or None, and whether its URL is fresh.
+
+        Expired entries are still returned so they can be re-resolved by
+        video ID instead of searching again.
+        """
+        video_id = self.queries.get(key)
+
+        if video_id not in self.videos:
+            self.misses += 1
+            return None, False
+
+        self.queries.move_to_end(key)
+        self.videos.move_to_end(video_id)
+        expires, info = self.videos[video_id]
+
+        if expires - time.time() > STREAM_EXPIRY_MARGIN:
+            self.hits += 1
+            return info, True
+
+        self.refreshes += 1
+        return info, False
+
+    def peek(self, key):
+        """
+        Accepts query key.
+        Returns cached info dict whether or not it's fresh, without
+        counting a hit or miss.
+        """
+        video_id = self.queries.get(key)
+        return self.videos[video_id][1] if video_id in self.videos else None
+
+    def put(self, key, info):
+        """Accepts query key and info dict."""
+        now = time.time()
+        self.videos[info['id']] = (stream_expiry(info, now), info)
+        self.videos.move_to_end(info['id'])
+        self.queries[key] = info['id']
+        self.queries.move_to_end(key)
+        self.queries[f"id:{info['id']}"] = info['id']
+
+        while len(self.videos) > self.maxsize:
+            self.videos.popitem(last=False)
+
+        # searches outnumber videos, but stale mappings are cheap
+        while len(self.queries) > self.maxsize * 4:
+            self.queries.popitem(last=False)
+
+    def stats(self):
+        """Returns summary of cache performance."""
+        total = self.hits + self.misses + self.refreshes
+        rate = round(self.hits / total * 100) if total else 0
+
+        return (f"YouTube cache: {self.hits} hits, {self.misses} misses, "
+                f"{self.refreshes} expired, {rate}% hit rate, "
+                f"{len(self.videos)} videos.")
+
+def opus_passthrough(toc):
+    """
+    Accepts TOC byte of an Opus packet.
+    Returns whether the packet can be sent to Discord as it is.
+
+    Requires one 20 ms frame per packet, which is what Discord expects
+    and what opusenc and FFmpeg write by default.
+    """
+    config, code = toc >> 3, toc & 3
+
+    if config < 12: # SILK: 10, 20, 40, 60 ms
+        frame = (10, 20, 40, 60)[config % 4]
+    elif config < 16: # hybrid: 10, 20 ms
+        frame = (10, 20)[config % 2]
+    else: # CELT: 2.5, 5, 10, 20 ms
+        frame = (2.5, 5, 10, 20)[config % 4]
+
+    return frame == 20 and code == 0
+
+def probe_ogg(path):
+    """
+    Accepts path to Ogg file.
+    Returns tuple of codec, granule position rate, pre-skip samples,
+    duration in seconds and whether its packets can be passed through
+    to Discord.
+
+    Reads only the headers and the last page.
+    """
+    with open(path, 'rb') as f:
+        packets = OggStream(f).iter_packets()
+        head = next(packets, b'')
+
+        if head.startswith(b'OpusHead'):
+            codec = 'opus'
+            pre_skip, = struct.unpack_from('<H', head, 10)
+            rate = 48000 # granule positions always count 48 kHz samples
+            next(packets, None) # OpusTags
+            passthrough = opus_passthrough(next(packets, b'\0')[0])
+        elif head.startswith(b'\x01vorbis'):
+            codec = 'vorbis'
+            pre_skip = 0
+            rate, = struct.unpack_from('<I', head, 12)
+            passthrough = False
+        else:
+            raise OggError('unsupported codec')
+
+        f.seek(max(os.fstat(f.fileno()).st_size - 65536, 0))
+        tail = f.read()
+
+    last = tail.rfind(b'OggS')
+
+    if last < 0:
+        raise OggError('no final page')
+
+    granule, = struct.unpack_from('<q', tail, last + 6)
+    duration = max(granule - pre_skip, 0) / rate
+    return codec, rate, pre_skip, duration, passthrough
+
+def measure_loudness(path):
+    """
+    Accepts path to sound file.
+    Returns tuple of integrated loudness in LUFS and true peak in dBTP.
+
+    Blocks; FFmpeg decodes the whole file.
+    """
+    result = subprocess.run([os.environ['FFMPEG_PATH'], '-nostdin',
+                             '-hide_banner', '-nostats', '-i', path,
+                             '-af', 'ebur128=peak=true', '-f', 'null', '-'],
+                            stdout=subprocess.DEVNULL,
+                            stderr=subprocess.PIPE, timeout=120, check=True)
+    log = result.stderr.decode(errors='replace')
+
+    # the summary follows the running measurements
+    return float(LUFS.findall(log)[-1]), float(PEAK.findall(log)[-1])
+
+def loudness_gain(loudness, peak):
+    """
+    Accepts integrated loudness in LUFS and true peak in dBTP.
+    Returns gain in dB bringing the sound to LOUDNESS_TARGET without
+    pushing its peak over LOUDNESS_PEAK, or 0 if it's already close.
+    """
+    if loudness is None or loudness <= -70: # unmeasurable or silent
+        return 0.0
+
+    gain = min(LOUDNESS_TARGET - loudness, LOUDNESS_PEAK - peak)
+    return round(gain, 1) if abs(gain) >= LOUDNESS_TOLERANCE else 0.0
+
+SoundFile = namedtuple('SoundFile', 'name path size mtime codec rate pre_skip '
+                       'duration passthrough gain', defaults=(0.0,))
+
+class LoudnessIndex:
+    """
+    Integrated loudness and true peak of local sounds by name, measured
+    with FFmpeg's ebur128 filter and kept in a JSON sidecar file.
+    Entries hold the file's size and modification time, so a sound is
+    measured again only once it changes.
+    """
+    def __init__(self, path=LOUDNESS_INDEX):
+        self.path = path
+        self.entries = {} # name: [size, mtime, loudness, peak]
+
+        try:
+            with open(path) as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            pass
+
+    def gain(self, sound):
+        """
+        Accepts SoundFile.
+        Returns its gain in dB, or None if it hasn't been measured.
+        """
+        entry = self.entries.get(sound.name)
+
+        if not entry or entry[:2] != [sound.size, sound.mtime]:
+            return None
+
+        return loudness_gain(*entry[2:])
+
+    def measure(self, sound):
+        """
+        Accepts SoundFile.
+        Measures and records its loudness. Sounds FFmpeg can't measure are
+        recorded too, so they aren't retried until they change.
+
+        Blocks.
+        """
+        try:
+            loudness, peak = measure_loudness(sound.path)
+        except (OSError, subprocess.SubprocessError, IndexError,
+                ValueError) as e:
+            print(f"Couldn't measure loudness of '{sound.path}': {repr(e)}")
+            loudness = peak = None
+
+        self.entries[sound.name] = [sound.size, sound.mtime, loudness, peak]
+
+    def save(self, names):
+        """
+        Accepts names of sounds still in the library.
+        Writes the index, dropping entries for other sounds.
+        """
+        self.entries = {name: entry for name, entry in self.entries.items()
+                        if name in names}
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+
+        # replace the file in one step so a crash can't leave half of it
+        with open(f'{self.path}.part', 'w') as f:
+            json.dump(self.entries, f)
+
+        os.replace(f'{self.path}.part', self.path)
+
+class PageIndex:
+    """
+    Granule positions and byte offsets of an Ogg file's pages, so playback
+    can start at any timestamp without reading or decoding up to it.
+    """
+    def __init__(self, sound):
+        self.rate = sound.rate
+        self.pre_skip = sound.pre_skip
+        pages = []
+        offset = 0
+
+        # read only page headers, skipping over the packet data
+        with open(sound.path, 'rb') as f:
+            while True:
+                header = f.read(27)
+
+                if len(header) < 27:
+                    break
+                elif not header.startswith(b'OggS'):
+                    raise OggError('invalid header magic')
+
+                granule, = struct.unpack_from('<q', header, 6)
+                pages.append((offset, header[5] & 1, granule))
+                offset += 27 + header[26] + sum(f.read(header[26]))
+                f.seek(offset)
+
+        # header pages have granule position 0 and end on a page boundary
+        audio = next((i for i, page in enumerate(pages) if page[2]),
+                     len(pages))
+        self.head = pages[audio][0] if audio < len(pages) else offset
+
+        # playback from the first audio page covers the start of the file
+        self.granules = [0]
+        self.resume = [(self.head, False)]
+
+        for page, following in zip(pages[audio:], pages[audio + 1:]):
+            if page[2] > self.granules[-1]: # -1 if no packet ends here
+                self.granules.append(page[2])
+                self.resume.append(following[:2])
+
+    def seek(self, seconds):
+        """
+        Accepts timestamp in seconds; negative ones seek to the start.
+        Returns tuple of byte offset of the page to resume from, whether it
+        starts partway through a packet, and 20 ms frames to drop after it.
+        """
+        sample = round(max(seconds, 0) * self.rate) + self.pre_skip
+        i = bisect.bisect_right(self.granules, sample) - 1
+        offset, continued = self.resume[i]
+        skip = (sample - max(self.granules[i], self.pre_skip)) / self.rate
+        return offset, continued, max(int(skip / 0.02), 0)
+
+@functools.lru_cache(maxsize=64)
+def page_index(sound):
+    """
+    Accepts SoundFile.
+    Returns its PageIndex, built on first use and kept until it changes.
+    """
+    return PageIndex(sound)
+
+def feed_ogg(stdin, path, head=0, offset=0):
+    """
+    Accepts FFmpeg's stdin, path to Ogg file, size of its header pages and
+    offset of the page to resume from.
+    Writes the header pages followed by the file from that page in the
+    background, so FFmpeg decodes it as though it were a whole file.
+    """
+    def copy():
+        try:
+            with open(path, 'rb') as f, stdin:
+                stdin.write(f.read(head))
+                f.seek(offset)
+                shutil.copyfileobj(f, stdin)
+        except OSError:
+            pass # FFmpeg stopped reading
+
+    threading.Thread(target=copy, daemon=True).start()
+
+def normalize_sound(name):
+    """
+    Accepts sound name.
+    Returns case- and separator-insensitive index key.
+    """
+    return name.replace('\\', '/').strip('/').casefold()
+
+class SoundLibrary:
+    """
+    Index of local Ogg sounds by normalized name.
+    Rescans compare file sizes and times, so only changed files are read.
+    Sounds carry the gain from their LoudnessIndex entry once measured.
+    """
+    def __init__(self, root=SOUNDS_DIR, loudness=None):
+        self.root = root
+        self.sounds = {}
+        self.loudness = loudness if loudness is not None else LoudnessIndex()
+        self.scan()
+
+    def __len__(self):
+        return len(self.sounds)
+
+    def __iter__(self):
+        return iter(sorted(self.sounds.values()))
+
+    def scan(self):
+        """
+        Updates the index from the sounds folder.
+        Returns number of sounds added, changed or removed.
+
+        Blocks; the new index replaces the old one in a single assignment,
+        so lookups can run while a scan is in progress.
+        """
+        sounds = {}
+        changed = 0
+
+        for folder, _, files in os.walk(self.root):
+            for file in files:
+                if not file.lower().endswith('.ogg'):
+                    continue
+
+                path = os.path.join(folder, file)
+                name = os.path.relpath(path, self.root)[:-4]
+                name = name.replace(os.sep, '/')
+                key = normalize_sound(name)
+                old = self.sounds.get(key)
+
+                try:
+                    stat = os.stat(path)
+
+                    if (old and old.path == path and old.size == stat.st_size
+                            and old.mtime == stat.st_mtime):
+                        sounds[key] = old
+                        continue
+
+                    probe = probe_ogg(path)
+                except (OSError, OggError, struct.error) as e:
+                    print(f"Skipped sound '{path}': {repr(e)}")
+                    continue
+
+                sound = SoundFile(name, path, stat.st_size, stat.st_mtime,
+                                  *probe)
+                sounds[key] = sound._replace(
+                    gain=self.loudness.gain(sound) or 0.0)
+                changed += 1
+
+        changed += len(self.sounds.keys() - sounds.keys())
+        self.sounds = sounds
+        return changed
+
+    def analyze(self):
+        """
+        Measures loudness of sounds that are new or changed since they
+        were last measured, then applies their gain.
+        Returns number of sounds measured.
+
+        Blocks; like scan, the updated index replaces the old one in a
+        single assignment.
+        """
+        if not os.getenv('FFMPEG_PATH'):
+            return 0
+
+        stale = [sound for sound in self.sounds.values()
+                 if self.loudness.gain(sound) is None]
+
+        for sound in stale:
+            self.loudness.measure(sound)
+
+        names = {sound.name for sound in self.sounds.values()}
+
+        if stale or self.loudness.entries.keys() - names:
+            self.loudness.save(names)
+
+        sounds = dict(self.sounds)
+
+        for key, sound in sounds.items():
+            gain = self.loudness.gain(sound)
+
+            if gain is not None and gain != sound.gain:
+                sounds[key] = sound._replace(gain=gain)
+
+        self.sounds = sounds
+        return len(stale)
+
+    def find(self, name):
+        """
+        Accepts sound name, prefix or misspelling.
+        Returns closest SoundFile, or None if nothing is close.
+
+        Exact names win, then the shortest name with the given prefix,
+        then the closest fuzzy match.
+        """
+        sounds = self.sounds
+        key = normalize_sound(name)
+
+        if key in sounds:
+            return sounds[key]
+
+        prefixed = [k for k in sounds if k.startswith(key)]
+
+        if prefixed:
+            return sounds[min(prefixed, key=lambda k: (len(k), k))]
+
+        close = difflib.get_close_matches(key, sounds, n=1, cutoff=0.6)
+        return sounds[close[0]] if close else None
+
+class OggOpusAudio(discord.AudioSource):
+    """
+    Opus packets read straight from an Ogg Opus file.
+    Needs no FFmpeg process or re-encoding.
+    Starts from a page offset given by PageIndex.seek if one is given.
+    """
+    def __init__(self, path, offset=0, continued=False, skip=0):
+        self.file = open(path, 'rb')
+        self.file.seek(offset)
+        self.packets = OggStream(self.file).iter_packets()
+        self.frames = 0
+
+        if not offset:
+            drop = 2 # OpusHead and OpusTags
+        else:
+            drop = skip + continued # tail of a packet split across pages
+
+        for _ in range(drop):
+            next(self.packets, None)
+
+    def read(self):
+        packet = next(self.packets, b'')
+        self.frames += bool(packet)
+        return packet
+
+    def is_opus(self):
+        return True
+
+    def cleanup(self):
+        self.file.close()
+
+class OpusFrames:
+    """
+    Encoded Opus frames of a sound packed into one buffer.
+    Indexing returns the frame at that 20 ms step.
+    """
+    __slots__ = ('data', 'offsets')
+
+    def __init__(self, frames):
+        self.data = b''.join(frames)
+        self.offsets = array('I', [0])
+
+        for frame in frames:
+            self.offsets.append(self.offsets[-1] + len(frame))
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return self.data[self.offsets[i]:self.offsets[i + 1]]
+
+    @property
+    def nbytes(self):
+        return len(self.data) + self.offsets.itemsize * len(self.offsets)
+
+class FrameCache:
+    """
+    LRU cache of OpusFrames by SoundFile, bounded by total bytes.
+    Counts hits, misses and evictions.
+
+    Keys include file size and time, so edited sounds miss and age out.
+    Filled from the voice threads, so access is locked.
+    """
+    def __init__(self, maxbytes=FRAME_CACHE_BYTES,
+                 soundbytes=FRAME_CACHE_SOUND_BYTES):
+        self.maxbytes = maxbytes
+        self.soundbytes = soundbytes
+        self.entries = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, sound):
+        """
+        Accepts SoundFile.
+        Returns its OpusFrames, or None if not cached.
+        """
+        with self.lock:
+            frames = self.entries.get(sound)
+
+            if frames:
+                self.entries.move_to_end(sound)
+                self.hits += 1
+            else:
+                self.misses += 1
+
+            return frames
+
+    def put(self, sound, frames):
+        """Accepts SoundFile and list of its encoded frames."""
+        frames = OpusFrames(frames)
+
+        with self.lock:
+            if sound in self.entries or frames.nbytes > self.soundbytes:
+                return
+
+            self.entries[sound] = frames
+            self.nbytes += frames.nbytes
+
+            while self.nbytes > self.maxbytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.nbytes -= evicted.nbytes
+                self.evictions += 1
+
+    def stats(self):
+        """Returns summary of cache performance and memory use."""
+        total = self.hits + self.misses
+        rate = round(self.hits / total * 100) if total else 0
+
+        return (f"Frame cache: {self.hits} hits, {self.misses} misses, "
+                f"{rate}% hit rate, {len(self.entries)} sounds, "
+                f"{self.nbytes / 2**20:.1f}/{self.maxbytes / 2**20:.0f} MiB, "
+                f"{self.evictions} evicted.")
+
+class CachedOpusAudio(discord.AudioSource):
+    """Opus frames played from the shared FrameCache."""
+    def __init__(self, buffer, skip=0):
+        self.buffer = buffer
+        self.position = skip
+        self.frames = 0
+
+    def read(self):
+        if self.position >= len(self.buffer):
+            return b''
+
+        self.position += 1
+        self.frames += 1
+        return self.buffer[self.position - 1]
+
+    def is_opus(self):
+        return True
+
+class FrameRecorder(discord.AudioSource):
+    """
+    Opus source played from the start, whose frames are added to the
+    FrameCache once it plays to the end.
+    Gives up recording if the sound is too big to cache, and doesn't
+    cache streams that end early, e.g. because FFmpeg died.
+    """
+    def __init__(self, source, sound, cache):
+        self.source = source
+        self.sound = sound
+        self.cache = cache
+        self.recorded = []
+        self.nbytes = 0
+
+    @property
+    def frames(self):
+        return self.source.frames
+
+    def read(self):
+        packet = self.source.read()
+
+        if self.recorded is None:
+            return packet
+        elif not packet:
+            # a frame of slack for padding and rounding
+            if len(self.recorded) >= self.sound.duration / FRAME_LENGTH - 1:
+                self.cache.put(self.sound, self.recorded)
+
+            self.recorded = None
+        elif self.nbytes + len(packet) > self.cache.soundbytes:
+            self.recorded = None
+        else:
+            self.recorded.append(packet)
+            self.nbytes += len(packet)
+
+        return packet
+
+    def is_opus(self):
+        return True
+
+    def cleanup(self):
+        self.source.cleanup()
+
+class FFmpegPool:
+    """
+    Idle FFmpeg processes spawned ahead of time, keyed by arguments.
+
+    Only processes reading their input from stdin are pooled, since those
+    can be handed any sound. A key is kept warm once it has been used.
+    """
+    def __init__(self, size=FFMPEG_WARM):
+        self.size = size
+        self.idle = {} # args: deque of processes
+        self.lock = threading.Lock()
+        self.closed = False
+        self.hits = 0
+        self.misses = 0
+
+    def take(self, args):
+        """
+        Accepts FFmpeg argument list.
+        Returns idle process started with those arguments, or None.
+        Spawns replacements in the background.
+        """
+        key = tuple(args)
+        process = None
+
+        with self.lock:
+            idle = self.idle.setdefault(key, deque())
+
+            while idle and not process:
+                process = idle.popleft()
+
+                if process.poll() is not None:
+                    self.reap(process)
+                    process = None
+
+            self.hits += bool(process)
+            self.misses += not process
+
+        if self.size:
+            threading.Thread(target=self.fill, args=(key,),
+                             daemon=True).start()
+
+        return process
+
+    def fill(self, key):
+        """Spawns processes until key has size idle ones."""
+        while True:
+            with self.lock:
+                if self.closed or len(self.idle[key]) >= self.size:
+                    return
+
+            try:
+                process = subprocess.Popen(key, stdin=subprocess.PIPE,
+                                           stdout=subprocess.PIPE)
+            except (OSError, subprocess.SubprocessError):
+                return
+
+            with self.lock:
+                if not self.closed:
+                    self.idle[key].append(process)
+                    continue
+
+            self.reap(process)
+            return
+
+    def stats(self):
+        """Returns summary of pool use."""
+        total = self.hits + self.misses
+        rate = round(self.hits / total * 100) if total else 0
+        idle = sum(len(idle) for idle in self.idle.values())
+
+        return (f"FFmpeg pool: {self.hits} warm starts, {self.misses} cold, "
+                f"{rate}% warm, {idle} idle.")
+
+    @staticmethod
+    def reap(process):
+        """Kills process, closes its pipes and waits for it to exit."""
+        process.kill()
+        process.stdin.close()
+        process.stdout.close()
+        process.wait()
+
+    def close(self):
+        """Kills idle processes."""
+        with self.lock:
+            self.closed = True
+            idle = [process for idle in self.idle.values()
+                    for process in idle]
+            self.idle.clear()
+
+        for process in idle:
+            self.reap(process)
+
+class FrameCounter:
+    """
+    Mixin for FFmpeg sources that drops the first frames read, to finish
+    seeking within a page, and counts frames sent, to track position.
+    """
+    def __init__(self, *args, skip=0, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.skip = skip
+        self.frames = 0
+
+    def read(self):
+        while self.skip:
+            self.skip -= 1
+
+            if not super().read():
+                return b''
+
+        packet = super().read()
+        self.frames += bool(packet)
+        return packet
+
+class PooledFFmpeg:
+    """
+    Mixin for FFmpeg sources reading stdin that start from an idle
+    process in an FFmpegPool when there is one.
+    """
+    def __init__(self, *args, pool=None, **kwargs):
+        self.pool = pool
+        super().__init__(*args, **kwargs)
+
+    def _spawn_process(self, args, **subprocess_kwargs):
+        process = None
+
+        if self.pool and subprocess_kwargs.get('stdin') == subprocess.PIPE:
+            process = self.pool.take(args)
+
+        return process or super()._spawn_process(args, **subprocess_kwargs)
+
+    def feed(self, path, head=0, offset=0):
+        """Writes sound to FFmpeg's stdin; see feed_ogg."""
+        feed_ogg(self._process.stdin, path, head, offset)
+
+    def cleanup(self):
+        process = self._process
+
+        # the feed closes stdin once done, and communicate() would flush it
+        if process and process.stdin and process.stdin.closed:
+            process.stdin = None
+
+        super().cleanup()
+
+class FFmpegOpusSound(FrameCounter, PooledFFmpeg, discord.FFmpegOpusAudio):
+    """Opus encoded by FFmpeg from a local sound."""
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.skip += 2 # OpusHead and OpusTags aren't audio
+
+class FFmpegPCMSound(FrameCounter, PooledFFmpeg, discord.FFmpegPCMAudio):
+    """PCM decoded by FFmpeg from a local sound."""
+
+class Mixer(discord.AudioSource):
+    """
+    PCM source summing several PCM sources, each with its own volume.
+    Ends once every layer has ended.
+
+    Frames are mixed with NumPy in float32 and clipped to 16 bits, so
+    a frame costs a few array operations per layer.
+    """
+    SAMPLES = (discord.opus.Encoder.SAMPLES_PER_FRAME
+               * discord.opus.Encoder.CHANNELS)
+
+    def __init__(self, volume=1.0):
+        self.volume = volume
+        self.layers = [] # [source, volume]
+        self.lock = threading.Lock()
+        self.mix = np.zeros(self.SAMPLES, dtype=np.float32)
+        self.layer = np.zeros(self.SAMPLES, dtype=np.float32)
+
+    def __len__(self):
+        return len(self.layers)
+
+    def add(self, source, volume=1.0):
+        """
+        Accepts PCM source and its volume multiplier.
+        Raises MixerFullError if MIXER_LAYERS sources are already mixed.
+        """
+        with self.lock:
+            if len(self.layers) >= MIXER_LAYERS:
+                raise MixerFullError
+
+            self.layers.append([source, volume])
+
+    def read(self):
+        with self.lock:
+            layers = list(self.layers)
+
+        if not layers:
+            return b''
+
+        self.mix.fill(0)
+        ended = []
+
+        for layer in layers:
+            source, volume = layer
+            data = source.read()
+
+            if len(data) < discord.opus.Encoder.FRAME_SIZE:
+                ended.append(layer)
+
+                if not data:
+                    continue
+
+                data = data.ljust(discord.opus.Encoder.FRAME_SIZE, b'\0')
+
+            np.multiply(np.frombuffer(data, dtype=np.int16), volume,
+                        out=self.layer)
+            self.mix += self.layer
+
+        if ended:
+            with self.lock:
+                for layer in ended:
+                    self.layers.remove(layer)
+                    layer[0].cleanup()
+
+        self.mix *= self.volume
+        np.clip(self.mix, -32768, 32767, out=self.mix)
+        return self.mix.astype(np.int16).tobytes()
+
+    def cleanup(self):
+        with self.lock:
+            for source, _ in self.layers:
+                source.cleanup()
+
+            self.layers.clear()
+
+class TrackCache:
+    """
+    Folder of YouTube tracks transcoded to Ogg Opus after their first play,
+    bounded by total bytes and evicted least recently played first.
+    Counts hits, misses and tracks stored.
+
+    Files are named by video ID. Playing one updates its modification
+    time, so eviction order survives restarts.
+    """
+    def __init__(self, root=YOUTUBE_CACHE_DIR, maxbytes=YOUTUBE_CACHE_BYTES):
+        self.root = root
+        self.maxbytes = maxbytes
+        self.tracks = OrderedDict() # video ID: SoundFile
+        self.pending = set()
+        self.jobs = asyncio.Semaphore(YOUTUBE_CACHE_JOBS)
+        self.hits = 0
+        self.misses = 0
+        self.stored = 0
+        os.makedirs(root, exist_ok=True)
+
+        files = []
+
+        for file in os.listdir(root):
+            path = os.path.join(root, file)
+
+            if file.endswith('.part'): # interrupted transcode
+                os.remove(path)
+            elif file.endswith('.ogg'):
+                files.append((os.path.getmtime(path), file[:-4]))
+
+        for _, video_id in sorted(files):
+            self.add(video_id)
+
+    def __len__(self):
+        return len(self.tracks)
+
+    @property
+    def nbytes(self):
+        return sum(sound.size for sound in self.tracks.values())
+
+    def path(self, video_id):
+        return os.path.join(self.root, f'{video_id}.ogg')
+
+    def add(self, video_id):
+        """
+        Accepts ID of a video transcoded into the cache folder.
+        Indexes it, then evicts tracks until the cache fits.
+        """
+        path = self.path(video_id)
+
+        try:
+            stat = os.stat(path)
+            probe = probe_ogg(path)
+        except (OSError, OggError, struct.error) as e:
+            print(f"Dropped cached track '{path}': {repr(e)}")
+
+            if os.path.exists(path):
+                os.remove(path)
+            return
+
+        self.tracks[video_id] = SoundFile(video_id, path, stat.st_size,
+                                          stat.st_mtime, *probe)
+        self.tracks.move_to_end(video_id)
+
+        while self.nbytes > self.maxbytes and len(self.tracks) > 1:
+            _, evicted = self.tracks.popitem(last=False)
+
+            # open files keep playing after removal
+            try:
+                os.remove(evicted.path)
+            except OSError:
+                pass
+
+    def get(self, video_id):
+        """
+        Accepts video ID.
+        Returns SoundFile of its cached copy, or None.
+        """
+        sound = self.tracks.get(video_id)
+
+        if not sound:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.tracks.move_to_end(video_id)
+
+        try:
+            os.utime(sound.path)
+        except OSError:
+            pass
+
+        return sound
+
+    def cacheable(self, info):
+        """
+        Accepts info dict.
+        Returns whether the video should be transcoded into the cache.
+        """
+        duration = info.get('duration') or 0
+
+        return (bool(re.fullmatch(r'[\w-]{11}', info['id']))
+                and not info.get('is_live')
+                and 0 < duration <= YOUTUBE_CACHE_MAX_LENGTH
+                and info['id'] not in self.tracks
+                and info['id'] not in self.pending)
+
+    async def store(self, info):
+        """
+        Accepts info dict.
+        Transcodes the video's audio to Ogg Opus in the cache folder.
+        Runs alongside the first play, at most YOUTUBE_CACHE_JOBS at once.
+        """
+        if not self.cacheable(info):
+            return
+
+        self.pending.add(info['id'])
+        path = self.path(info['id'])
+        part = f'{path}.part'
+
+        try:
+            async with self.jobs:
+                process = await asyncio.create_subprocess_exec(
+                    os.environ['FFMPEG_PATH'], '-loglevel', 'error',
+                    *FFMPEG_STREAM_OPTS['before_options'].split(),
+                    '-i', info['formats'][0]['url'], '-vn',
+                    '-map_metadata', '-1', '-c:a', 'libopus',
+                    '-b:a', '128k', '-ar', '48000', '-ac', '2',
+                    '-frame_duration', '20', '-f', 'ogg', '-y', part,
+                    stdin=subprocess.DEVNULL)
+
+                try:
+                    returncode = await process.wait()
+                except asyncio.CancelledError:
+                    process.kill()
+                    raise
+
+            if returncode:
+                print(f"Couldn't cache '{info['title']}': "
+                      f"FFmpeg exited with {returncode}")
+                return
+
+            os.replace(part, path)
+            self.add(info['id'])
+            self.stored += 1
+        finally:
+            self.pending.discard(info['id'])
+
+            if os.path.exists(part):
+                os.remove(part)
+
+    def stats(self):
+        """Returns summary of cache performance and disk use."""
+        total = self.hits + self.misses
+        rate = round(self.hits / total * 100) if total else 0
+
+        return (f"Track cache: {self.hits} hits, {self.misses} misses, "
+                f"{rate}% hit rate, {len(self.tracks)} tracks, "
+                f"{self.nbytes / 2**20:.0f}/{self.maxbytes / 2**20:.0f} MiB, "
+                f"{self.stored} stored.")
+
+def percentile(samples, q):
+    """
+    Accepts iterable of numbers and fraction between 0 and 1.
+    Returns the sample at that rank, or 0 if there are none.
+    """
+    ordered = sorted(samples)
+
+    if not ordered:
+        return 0
+
+    return ordered[min(int(len(ordered) * q), len(ordered) - 1)]
+
+def ms(seconds):
+    """
+    Accepts duration in seconds.
+    Returns it in milliseconds, rounded for display and export.
+    """
+    return round(seconds * 1000, 3)
+
+class PlaybackStats:
+    """
+    Frame timing of one guild's playback.
+    Counters run since the cog loaded; percentiles cover the last
+    TELEMETRY_WINDOW frames.
+    """
+    def __init__(self):
+        self.tracks = 0
+        self.frames = 0
+        self.underruns = 0
+        self.stalls = 0
+        self.read = deque(maxlen=TELEMETRY_WINDOW) # s per frame
+        self.jitter = deque(maxlen=TELEMETRY_WINDOW) # s off 20 ms pace
+        self.first_frame = deque(maxlen=100) # s from play to first frame
+
+    def summary(self):
+        """Returns dict of counters and timings in ms."""
+        return {'tracks': self.tracks,
+                'frames': self.frames,
+                'underruns': self.underruns,
+                'stalls': self.stalls,
+                'read_mean': ms(sum(self.read) / len(self.read)
+                                if self.read else 0),
+                'read_p95': ms(percentile(self.read, 0.95)),
+                'read_max': ms(max(self.read, default=0)),
+                'jitter_p50': ms(percentile(self.jitter, 0.5)),
+                'jitter_p95': ms(percentile(self.jitter, 0.95)),
+                'jitter_max': ms(max(self.jitter, default=0)),
+                'first_frame_p50': ms(percentile(self.first_frame, 0.5)),
+                'first_frame_max': ms(max(self.first_frame, default=0))}
+
+class MeteredSource(discord.AudioSource):
+    """
+    Wrapper recording each frame's timing in a PlaybackStats.
+
+    Reads slower than one frame count as underruns and reads slower than
+    TELEMETRY_STALL as stalls, e.g. FFmpeg waiting on a slow stream.
+    The wrapped source can be swapped while playing.
+    """
+    def __init__(self, source, stats):
+        self.source = source
+        self.stats = stats
+        self.created = time.perf_counter()
+        self.last = None
+        stats.tracks += 1
+
+    def read(self):
+        start = time.perf_counter()
+        data = self.source.read()
+        end = time.perf_counter()
+        stats = self.stats
+
+        if self.last is None:
+            stats.first_frame.append(end - self.created)
+        elif start - self.last < 1: # longer gaps are pauses
+            stats.jitter.append(abs(start - self.last - FRAME_LENGTH))
+
+        self.last = start
+        stats.frames += 1
+        stats.read.append(end - start)
+        stats.underruns += end - start > FRAME_LENGTH
+        stats.stalls += end - start > TELEMETRY_STALL
+        return data
+
+    def is_opus(self):
+        return self.source.is_opus()
+
+    def cleanup(self):
+        self.source.cleanup()
+
+class Track:
+    """
+    Queued sound.
+    Subclasses open the track's audio source.
+    """
+    def __init__(self, title):
+        self.title = title
+        self.gain = 1.0 # multiplier applied on PCM playback
+        self.task = None
+
+    async def open(self, pcm):
+        """
+        Accepts whether PCM is required, e.g. to adjust volume.
+        Returns new AudioSource for the track.
+        """
+        raise NotImplementedError
+
+    def reopen(self, offset):
+        """
+        Accepts seconds already played.
+        Returns new PCM AudioSource resuming the track from there.
+        """
+        raise NotImplementedError
+
+    def started(self):
+        """Called once the track starts playing."""
+
+    def prefetch(self, pcm=False):
+        """
+        Accepts whether PCM is required.
+        Starts opening the track's source if it isn't already. Errors are
+        kept with the task and raised when the track is prepared.
+        """
+        if not self.task:
+            self.task = asyncio.ensure_future(self.open(pcm))
+
+    async def prepare(self, pcm=False):
+        """
+        Accepts whether PCM is required.
+        Returns the track's AudioSource, opening it on first call.
+        Concurrent callers share the same source.
+        """
+        self.prefetch(pcm)
+        return await asyncio.shield(self.task)
+
+    def cleanup(self):
+        """Releases the track's source if it was opened but never played."""
+        if not self.task:
+            return
+        elif not self.task.done():
+            self.task.cancel()
+        elif not self.task.cancelled() and not self.task.exception():
+            self.task.result().cleanup()
+
+class SoundTrack(Track):
+    """
+    Local sound file played from a timestamp in seconds.
+    Plays from the FrameCache if given one that holds the sound, and
+    decodes with warm processes from the FFmpegPool if given one.
+
+    Sounds with a loudness gain have it applied by FFmpeg when played as
+    Opus, and by the volume transformer when played as PCM.
+    """
+    def __init__(self, sound, start=0, cache=None, pool=None):
+        super().__init__(f'{sound.name}.ogg')
+        self.sound = sound
+        self.gain = 10 ** (sound.gain / 20)
+        self.path = sound.path
+        self.start = start
+        self.cache = cache
+        self.pool = pool
+
+    async def open(self, pcm):
+        if pcm:
+            return self.reopen(0)
+
+        buffer = self.cache.get(self.sound) if self.cache is not None else None
+
+        if buffer:
+            return CachedOpusAudio(buffer, int(self.start / 0.02))
+
+        # Opus files at the target loudness are sent as is; others are
+        # encoded by FFmpeg
+        if self.sound.passthrough and not self.sound.gain:
+            if not self.start:
+                source = OggOpusAudio(self.path)
+            else:
+                return OggOpusAudio(self.path,
+                                    *page_index(self.sound).seek(self.start))
+        elif not self.start:
+            source = self.ffmpeg(FFmpegOpusSound, 0, self.sound.gain)
+        else:
+            return self.ffmpeg(FFmpegOpusSound, self.start, self.sound.gain)
+
+        # whole plays fill the cache for the next guild to play the sound
+        if self.cache is not None:
+            return FrameRecorder(source, self.sound, self.cache)
+
+        return source
+
+    def reopen(self, offset):
+        return self.ffmpeg(FFmpegPCMSound, self.start + offset)
+
+    def ffmpeg(self, cls, start, gain=0):
+        """
+        Accepts FFmpeg source class, timestamp in seconds and gain in dB.
+        Returns source starting from there.
+
+        The sound is fed through stdin, so FFmpeg's arguments are the same
+        for every sound and a warm process can be used. Seeks feed the
+        headers and the pages from the timestamp on, so start-up doesn't
+        depend on how far in it is. Gains change the arguments, so those
+        processes start cold; whole plays are then served from the
+        FrameCache.
+        """
+        head = offset = skip = 0
+        kwargs = {'pool': self.pool}
+
+        if start:
+            index = page_index(self.sound)
+            head = index.head
+            offset, _, skip = index.seek(start)
+
+        if gain:
+            kwargs = {'options': f'-af volume={gain}dB'}
+
+        source = cls(subprocess.PIPE, pipe=True, skip=skip,
+                     executable=os.environ['FFMPEG_PATH'], **kwargs)
+        source.feed(self.path, head, offset)
+        return source
+
+class YouTubeTrack(Track):
+    """
+    YouTube video streamed from its extracted info.
+    Passes the info to on_play, if given, once it starts playing.
+    """
+    def __init__(self, info, on_play=None):
+        super().__init__(info['title'])
+        self.info = info
+        self.on_play = on_play
+
+    def started(self):
+        if self.on_play:
+            self.on_play(self.info)
+
+    async def open(self, pcm):
+        return discord.FFmpegPCMAudio(executable=os.environ['FFMPEG_PATH'],
+                                      source=self.info['formats'][0]['url'],
+                                      **FFMPEG_STREAM_OPTS)
+
+class Playlist:
+    """
+    YouTube playlist queued as a single item.
+
+    Entries are listed lazily and each is resolved into a track only when
+    it's next to play, so a long playlist costs about as much up front as
+    one video and only one entry is held at a time. Entries that can't be
+    played are skipped.
+    """
+    RETRIES = 3 # listing attempts turned away or timed out in a row
+
+    def __init__(self, title, entries, run, make_track):
+        self.title = f'{title} (playlist)'
+        self.entries = entries
+        self.run = run # runs blocking calls in the extractor pool
+        self.make_track = make_track # resolves entry into Track or None
+        self.task = None
+        self.lock = threading.Lock()
+        self.listed = deque()
+
+    def list_entry(self):
+        """
+        Lists the next entry, or None at the end, unless one is waiting.
+
+        Blocks; calls are serialized, so one still running after its caller
+        timed out hands its entry to the next instead of racing it.
+        """
+        with self.lock:
+            if not self.listed:
+                self.listed.append(next(self.entries, None))
+
+    async def next_entry(self):
+        """
+        Returns next entry, or None at the end.
+        Retries listing when the extractor pool is busy or times out.
+        """
+        for attempt in range(self.RETRIES):
+            try:
+                if not self.listed:
+                    await self.run(self.list_entry)
+
+                return self.listed.popleft()
+            except (ExtractorBusyError, asyncio.TimeoutError) as e:
+                if attempt == self.RETRIES - 1:
+                    raise
+
+                print(f"Retrying '{self.title}': {repr(e)}")
+                await asyncio.sleep(2 ** attempt)
+
+    async def resolve_next(self, pcm):
+        """
+        Accepts whether PCM is required.
+        Returns Track for the next playable entry, or None at the end.
+        Starts opening the track's source too.
+        """
+        while True:
+            entry = await self.next_entry()
+
+            if entry is None:
+                return None
+
+            try:
+                track = await self.make_track(entry)
+            except Exception as e:
+                print(f"Skipped '{entry.get('title')}': {repr(e)}")
+                continue
+
+            if track:
+                track.prefetch(pcm)
+                return track
+
+    def prefetch(self, pcm=False):
+        """Starts resolving the next entry if it isn't already."""
+        if not self.task:
+            self.task = asyncio.ensure_future(self.resolve_next(pcm))
+
+    async def prepare(self, pcm=False):
+        """
+        Accepts whether PCM is required.
+        Returns source of the next entry, or None if there are none left.
+        """
+        self.prefetch(pcm)
+        track = await asyncio.shield(self.task)
+        return await track.prepare(pcm) if track else None
+
+    async def pop(self):
+        """Returns next Track, or None once the playlist has ended."""
+        self.prefetch()
+        task, self.task = self.task, None
+        return await task
+
+    def cleanup(self):
+        """Abandons the entry being resolved or opened, if any."""
+        if not self.task:
+            return
+        elif not self.task.done():
+            self.task.cancel()
+        elif (not self.task.cancelled() and not self.task.exception()
+                and self.task.result()):
+            self.task.result().cleanup()
+
+class GuildPlayer:
+    """
+    Per-guild playback queue.
+
+    Advances from the voice client's after callback and opens the next
+    track's source while the current one plays, so transitions are gapless.
+
+    Sounds are played as Opus when possible, skipping PCM conversion and
+    Python-side encoding; they switch to PCM only to change volume.
+    """
+    def __init__(self, bot, guild):
+        self.bot = bot
+        self.guild = guild
+        self.queue = deque()
+        self.current = None
+        self.volume = 1.0
+        self.lock = asyncio.Lock()
+        self.stats = PlaybackStats()
+
+    async def add(self, track):
+        """
+        Accepts Track.
+        Returns queue position, or 0 if the track started immediately.
+
+        Raises the track's error if it can't be opened to play right away.
+        """
+        if not self.current and not self.queue:
+            await track.prepare(self.volume != 1)
+
+        self.queue.append(track)
+
+        if not self.current:
+            await self.advance()
+
+        if self.current is track:
+            return 0
+
+        self.lookahead()
+        return len(self.queue)
+
+    async def advance(self):
+        """
+        Starts the next queued track that opens successfully, unless a
+        track is already playing.
+
+        The finished track stays current until the next one starts, so
+        tracks added in the meantime are queued behind it.
+        """
+        async with self.lock:
+            voice = self.guild.voice_client
+
+            if voice and (voice.is_playing() or voice.is_paused()):
+                self.lookahead()
+                return
+
+            while self.queue and voice and voice.is_connected():
+                if isinstance(self.queue[0], Playlist):
+                    try:
+                        track = await self.queue[0].pop()
+                    except Exception as e:
+                        print(f"Skipped '{self.queue[0].title}': {repr(e)}")
+                        track = None
+
+                    if not track:
+                        self.queue.popleft()
+                        continue
+                else:
+                    track = self.queue.popleft()
+
+                try:
+                    source = await track.prepare(self.volume != 1)
+
+                    # volume changed since the track was prepared
+                    if source.is_opus() and self.volume != 1:
+                        source.cleanup()
+                        source = track.reopen(0)
+                except Exception as e:
+                    print(f"Skipped '{track.title}': {repr(e)}")
+                    continue
+
+                if not source.is_opus():
+                    source = discord.PCMVolumeTransformer(
+                        source, self.volume * track.gain)
+
+                try:
+                    voice.play(MeteredSource(source, self.stats),
+                               after=self.after)
+                except discord.ClientException as e:
+                    # the track keeps its place and reopens next time
+                    print(f"Couldn't play '{track.title}': {repr(e)}")
+                    track.cleanup()
+                    track.task = None
+                    self.queue.appendleft(track)
+                    break
+
+                self.current = track
+                track.started()
+                self.lookahead()
+                return
+
+            self.current = None
+
+    def after(self, err):
+        """Called from the voice thread when a track ends."""
+        if err:
+            print(f"Playback error in '{self.guild.name}': {repr(err)}")
+
+        asyncio.run_coroutine_threadsafe(self.advance(), self.bot.loop)
+
+    def lookahead(self):
+        """Starts opening the next track while the current one plays."""
+        if not (self.current and self.queue):
+            return
+        else:
+            self.queue[0].prefetch(self.volume != 1)
+
+    def set_volume(self, volume):
+        """
+        Accepts volume multiplier.
+        Applies it to the current track, switching it to PCM if necessary.
+        """
+        self.volume = volume
+        voice = self.guild.voice_client
+
+        if not (voice and voice.source and self.current):
+            return
+
+        meter = voice.source
+        old = meter.source
+
+        # mixer layers carry their own loudness gains
+        if isinstance(old, Mixer):
+            old.volume = volume
+        elif not old.is_opus():
+            old.volume = volume * self.current.gain
+        elif volume != 1:
+            source = self.current.reopen(old.frames * 0.02)
+            self.use_pcm(meter, discord.PCMVolumeTransformer(
+                source, volume * self.current.gain))
+            old.cleanup()
+
+    def use_pcm(self, meter, source):
+        """
+        Accepts playing MeteredSource and PCM source.
+        Swaps source in, giving the voice client an encoder for it.
+        """
+        voice = self.guild.voice_client
+
+        # discord.py only makes one if playback started as PCM
+        if voice.encoder is None:
+            voice.encoder = discord.opus.Encoder()
+
+        meter.source = source
+
+    async def overlay(self, track, volume):
+        """
+        Accepts Track and its volume multiplier.
+        Mixes track over the current sound, which keeps playing.
+
+        Raises MixerFullError if MIXER_LAYERS sounds are already playing.
+        """
+        meter = self.guild.voice_client.source
+        old = meter.source
+
+        if isinstance(old, Mixer) and len(old) >= MIXER_LAYERS:
+            raise MixerFullError
+
+        source = await track.prepare(pcm=True)
+
+        volume *= track.gain
+
+        if isinstance(old, Mixer):
+            old.add(source, volume)
+            return
+
+        # the mixer only takes PCM, so Opus playback restarts as PCM
+        if old.is_opus():
+            current = self.current.reopen(old.frames * 0.02)
+        else:
+            # the dropped transformer would clean up its source with it
+            current, old.original = old.original, discord.AudioSource()
+
+        mixer = Mixer(self.volume)
+        mixer.add(current, self.current.gain)
+        mixer.add(source, volume)
+        self.use_pcm(meter, mixer)
+
+        if old.is_opus():
+            old.cleanup()
+
+    def clear(self):
+        """Empties the queue."""
+        for track in self.queue:
+            track.cleanup()
+
+        self.queue.clear()
+
+class VoiceManager:
+    """
+    Per-guild voice connections.
+
+    Reuses live connections and moves them between channels, closes ones
+    left idle for VOICE_IDLE_TIMEOUT and reconnects ones dropped while
+    they still had sounds to play. Connections a member ended aren't
+    reconnected.
+    """
+    def __init__(self, bot):
+        self.bot = bot
+        self.channels = {} # guild ID: channel ID
+        self.active = {} # guild ID: time sound was last heard
+        self.leaving = set() # guild IDs disconnecting on purpose
+        self.idle_disconnects = 0
+        self.reconnects = 0
+
+    async def connect(self, channel):
+        """
+        Accepts voice channel.
+        Returns VoiceClient connected to it, reusing the guild's if live.
+        """
+        voice = channel.guild.voice_client
+
+        if voice and not voice.is_connected():
+            await voice.disconnect(force=True)
+            voice = None
+
+        if not voice:
+            voice = await channel.connect(timeout=VOICE_CONNECT_TIMEOUT)
+        elif voice.channel != channel:
+            await voice.move_to(channel)
+
+        self.channels[channel.guild.id] = channel.id
+        self.active[channel.guild.id] = time.monotonic()
+        return voice
+
+    async def disconnect(self, guild):
+        """Accepts guild and closes its voice connection for good."""
+        self.channels.pop(guild.id, None)
+        self.active.pop(guild.id, None)
+
+        if guild.voice_client:
+            self.leaving.add(guild.id)
+
+            try:
+                await guild.voice_client.disconnect()
+            finally:
+                self.leaving.discard(guild.id)
+
+    async def sweep(self):
+        """
+        Disconnects guilds that haven't played to anyone lately.
+        Returns list of guilds disconnected.
+        """
+        now = time.monotonic()
+        idle = []
+
+        for voice in list(self.bot.voice_clients):
+            guild = voice.guild
+            listeners = any(not m.bot for m in voice.channel.members)
+
+            if voice.is_playing() and listeners:
+                self.active[guild.id] = now
+            elif now - self.active.setdefault(guild.id, now) \
+                    >= VOICE_IDLE_TIMEOUT:
+                await self.disconnect(guild)
+                self.idle_disconnects += 1
+                idle.append(guild)
+
+        return idle
+
+    async def kicked(self, guild):
+        """
+        Accepts guild whose connection dropped.
+        Returns whether a member just disconnected the bot, going by the
+        audit log. Assumes not if the log can't be read.
+        """
+        if not guild.me.guild_permissions.view_audit_log:
+            return False
+
+        # audit log times are naive UTC; entries land shortly after a kick
+        since = datetime.utcnow() - timedelta(seconds=15)
+
+        try:
+            async for entry in guild.audit_logs(
+                    limit=5, action=discord.AuditLogAction.member_disconnect):
+                if entry.created_at >= since and entry.user != guild.me:
+                    return True
+        except discord.HTTPException:
+            pass
+
+        return False
+
+    async def reconnect(self, guild):
+        """
+        Accepts guild whose connection dropped.
+        Returns VoiceClient reconnected to its last channel, or None.
+        Backs off between attempts.
+
+        Gives up if a member disconnected the bot, or if the channel is
+        gone or can no longer be joined.
+        """
+        if await self.kicked(guild):
+            print(f"Disconnected from voice in '{guild.name}' by a member.")
+            self.channels.pop(guild.id, None)
+            return None
+
+        for attempt in range(VOICE_RECONNECT_ATTEMPTS):
+            await asyncio.sleep(2 ** attempt)
+            channel = guild.get_channel(self.channels.get(guild.id))
+
+            if (not channel or guild.id in self.leaving
+                    or not channel.permissions_for(guild.me).connect):
+                self.channels.pop(guild.id, None)
+                return None
+
+            try:
+                voice = await self.connect(channel)
+            except (asyncio.TimeoutError, discord.ClientException) as e:
+                print(f"Voice reconnect to '{guild.name}' failed: {repr(e)}")
+                continue
+
+            self.reconnects += 1
+            return voice
+
+        return None
+
+    def stats(self):
+        """Returns summary of voice connections."""
+        return (f"Voice connections: {len(self.bot.voice_clients)}, "
+                f"{self.idle_disconnects} idle disconnects, "
+                f"{self.reconnects} reconnects.")
 
 class VC(commands.Cog):
     """Cog wrapping voice channel commands."""
     def __init__(self, bot):
         self.bot = bot
+        self.players = {}
+        self.executor = ThreadPoolExecutor(max_workers=YTDL_WORKERS,
+                                           thread_name_prefix='ytdl')
+        self.slots = threading.BoundedSemaphore(YTDL_QUEUE_DEPTH)
+        self.extract_cache = ExtractCache()
+        self.library = SoundLibrary()
+        self.frame_cache = FrameCache()
+        self.ffmpeg_pool = FFmpegPool()
+        self.track_cache = TrackCache()
+        self.transcodes = set()
+        self.loop_lag = deque(maxlen=600) # s
+        self.monitor.start()
+        self.voices = VoiceManager(bot)
+        self.idle_check.start()
+        self.rescan.start()
+
+    def cog_unload(self):
+        self.rescan.cancel()
+        self.monitor.cancel()
+        self.idle_check.cancel()
+        self.ffmpeg_pool.close()
+
+        for task in self.transcodes:
+            task.cancel()
+
+        for player in self.players.values():
+            player.clear()
+
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    async def run_blocking(self, func, *args):
+        """
+        Accepts blocking youtube_dl function and its arguments.
+        Returns its result after running it in the extractor pool.
+
+        Raises ExtractorBusyError if YTDL_QUEUE_DEPTH lookups are pending.
+        Raises asyncio.TimeoutError after YTDL_TIMEOUT seconds.
+        """
+        # slot is held until extraction finishes, even if the caller gives up
+        if not self.slots.acquire(blocking=False):
+            raise ExtractorBusyError
+
+        try:
+            future = self.executor.submit(func, *args)
+        except RuntimeError:
+            self.slots.release()
+            raise
+
+        future.add_done_callback(lambda f: self.slots.release())
+
+        # timing out cancels the lookup if it hasn't started yet
+        return await asyncio.wait_for(asyncio.wrap_future(future),
+                                      YTDL_TIMEOUT)
+
+    async def extract(self, query):
+        """
+        Accepts YouTube URL or search terms.
+        Returns info dict after extracting it in the extractor pool.
+        """
+        return await self.run_blocking(extract, query)
+
+    def track_for(self, info):
+        """
+        Accepts info dict.
+        Returns Track playing the video's saved copy if there is one.
+        Otherwise streams it, saving a copy for next time once it plays.
+        """
+        cached = self.track_cache.get(info['id'])
+
+        if cached:
+            track = SoundTrack(cached, 0, self.frame_cache, self.ffmpeg_pool)
+            track.title = info['title']
+            return track
+
+        if self.track_cache.cacheable(info):
+            return YouTubeTrack(info, self.save_track)
+
+        return YouTubeTrack(info)
+
+    def save_track(self, info):
+        """
+        Accepts info dict of a video that started playing.
+        Saves a copy for next time without holding up this play.
+        """
+        if not self.track_cache.cacheable(info):
+            return
+
+        task = asyncio.ensure_future(self.track_cache.store(info))
+        self.transcodes.add(task)
+        task.add_done_callback(self.saved_track)
+
+    def saved_track(self, task):
+        """Forgets a finished transcode, logging it if it failed."""
+        self.transcodes.discard(task)
+
+        if not task.cancelled() and task.exception():
+            print(f"Couldn't cache track: {repr(task.exception())}")
+
+    async def playlist_track(self, entry):
+        """
+        Accepts flat playlist entry.
+        Returns Track for it, or None if it can't be played.
+        """
+        try:
+            info = await self.resolve(entry_url(entry))
+        except (youtube_dl.utils.DownloadError, ExtractorBusyError,
+                asyncio.TimeoutError) as e:
+            print(f"Skipped '{entry.get('title')}': {repr(e)}")
+            return None
+
+        return self.track_for(info) if info else None
+
+    async def resolve(self, query):
+        """
+        Accepts YouTube URL or search terms.
+        Returns info dict, from the cache if its stream URL is still fresh.
+
+        Expired entries are re-extracted by video ID, skipping the search.
+        """
+        key = query_key(query)
+        info, fresh = self.extract_cache.get(key)
+
+        if fresh:
+            return info
+        elif info:
+            info = await self.extract(
+                f"https://www.youtube.com/watch?v={info['id']}")
+        else:
+            info = await self.extract(query)
+
+        if info:
+            self.extract_cache.put(key, info)
+
+        return info
+
+    @tasks.loop(seconds=SOUND_SCAN_INTERVAL)
+    async def rescan(self):
+        """
+        Picks up sounds added, changed or removed since the last scan,
+        then measures the loudness of new and changed ones.
+        """
+        loop = asyncio.get_running_loop()
+        changed = await loop.run_in_executor(None, self.library.scan)
+
+        if changed:
+            print(f"Sound library updated: {changed} changes, "
+                  f"{len(self.library)} sounds.")
+
+        measured = await loop.run_in_executor(None, self.library.analyze)
+
+        if measured:
+            print(f"Measured loudness of {measured} sounds.")
+
+    @tasks.loop(seconds=1)
+    async def monitor(self):
+        """
+        Samples event loop lag: how long a ready task waits to run.
+        Voice threads compete with the loop, so lag shows up as jitter.
+        """
+        start = time.perf_counter()
+        await asyncio.sleep(0)
+        self.loop_lag.append(time.perf_counter() - start)
+
+    @tasks.loop(seconds=30)
+    async def idle_check(self):
+        """Frees voice connections nobody is listening to."""
+        for guild in await self.voices.sweep():
+            self.player(guild).clear()
+
+    @commands.Cog.listener()
+    async def on_voice_state_update(self, member, before, after):
+        """Reconnects if the bot is dropped with sounds still to play."""
+        guild = member.guild
+
+        if (member != guild.me or after.channel or not before.channel
+                or guild.id in self.voices.leaving
+                or guild.id not in self.voices.channels):
+            return
+
+        player = self.player(guild)
+
+        if not (player.current or player.queue):
+            return
+
+        if await self.voices.reconnect(guild):
+            await player.advance()
+        else:
+            player.clear()
+
+    def telemetry(self, guild=None):
+        """
+        Accepts guild, or None for every guild.
+        Returns dict of playback telemetry for export.
+        """
+        players = [self.player(guild)] if guild else self.players.values()
+
+        return {'time': time.time(),
+                'loop_lag_p50': ms(percentile(self.loop_lag, 0.5)),
+                'loop_lag_p95': ms(percentile(self.loop_lag, 0.95)),
+                'loop_lag_max': ms(max(self.loop_lag, default=0)),
+                'guilds': {str(player.guild.id): player.stats.summary()
+                           for player in players},
+                'caches': [self.voices.stats(),
+                           self.extract_cache.stats(),
+                           self.track_cache.stats(),
+                           self.frame_cache.stats(),
+                           self.ffmpeg_pool.stats()]}
+
+    @rescan.before_loop
+    @monitor.before_loop
+    @idle_check.before_loop
+    async def before_loop(self):
+        await self.bot.wait_until_ready()
+
+    def player(self, guild):
+        """
+        Accepts guild.
+        Returns the guild's GuildPlayer.
+        """
+        if guild.id not in self.players:
+            self.players[guild.id] = GuildPlayer(self.bot, guild)
+
+        return self.players[guild.id]
+
+    async def enqueue(self, ctx, track):
+        """
+        Accepts Track.
+        Joins author's voice channel if necessary, then queues track.
+        """
+        if not ctx.guild.voice_client:
+            await self.join(ctx)
+
+        if not ctx.guild.voice_client:
+            return
+
+        position = await self.player(ctx.guild).add(track)
+
+        if position:
+            await ctx.send(f"Queued `{track.title}` at position {position}.")
+        else:
+            await ctx.send(f"Playing `{track.title}`.")
 
     @commands.command(aliases=['connect'])
     async def join(self, ctx):
@@ -19,9 +2088,11 @@ class VC(commands.Cog):
             channel = voice.channel
             
             try:
-                await channel.connect()
-            except discord.errors.ClientException:
-                await ctx.guild.get_member(self.bot.user.id).move_to(channel)   
+                await self.voices.connect(channel)
+            except asyncio.TimeoutError:
+                await ctx.message.add_reaction('\U0001F916');
+                await ctx.send("Couldn't connect to voice.")
+                return
             
             await ctx.send(f"Joined `{channel.name}`.")
         else:
@@ -32,7 +2103,8 @@ class VC(commands.Cog):
     async def leave(self, ctx):
         """Disconnects bot from its voice channel."""
         if ctx.guild.voice_client:
-            await ctx.guild.voice_client.disconnect()
+            self.player(ctx.guild).clear()
+            await self.voices.disconnect(ctx.guild)
             await ctx.send("Left voice channel.")
         else:
             await ctx.message.add_reaction('\U0001F615');
@@ -70,14 +2142,53 @@ class VC(commands.Cog):
             await ctx.message.add_reaction('\U0001F615')
             await ctx.send("Not in a voice channel.")
 
+    @commands.command(aliases=['q'])
+    async def queue(self, ctx):
+        """Lists current and queued sounds."""
+        player = self.player(ctx.guild)
+
+        if not player.current:
+            await ctx.send("Nothing queued.")
+            return
+
+        lines = [f"Now playing: `{player.current.title}`"]
+        lines.extend(f"{i}. `{track.title}`"
+                     for i, track in enumerate(player.queue, 1))
+        await ctx.send('\n'.join(lines))
+
+    @commands.command(aliases=['next'])
+    async def skip(self, ctx):
+        """Skips to the next queued sound."""
+        voice = ctx.guild.voice_client
+
+        if voice and (voice.is_playing() or voice.is_paused()):
+            voice.stop()
+            await ctx.send("Skipped.")
+        else:
+            await ctx.message.add_reaction('\U0001F615')
+            await ctx.send("Not playing anything right now.")
+
+    @commands.command(name='clear', aliases=['clr'])
+    async def clear_queue(self, ctx):
+        """Removes all queued sounds without stopping the current one."""
+        player = self.player(ctx.guild)
+
+        if player.queue:
+            player.clear()
+            await ctx.send("Queue cleared.")
+        else:
+            await ctx.message.add_reaction('\U0001F615')
+            await ctx.send("Queue already empty.")
+
     @commands.command(aliases=['snd'])
     async def sound(self, ctx, name='default', start=0):
         """
         Plays local sound from timestamp in seconds.
-        Searches for sound 'sounds/[name].ogg'.
+        Searches for sound 'sounds/[name].ogg', accepting name prefixes
+        and close misspellings.
 
         Joins author's voice channel if not in one.
-        Interrupts current sound if necessary.
+        Queues sound if another is playing.
         Default sound is 'sounds/default.ogg'.
         Starts at beginning by default.
         """
@@ -88,11 +2199,14 @@ class VC(commands.Cog):
             await ctx.send("Not in a voice channel.")
             return
         
-        ffmpeg_path = os.environ['FFMPEG_PATH']
-        sound_path = f'sounds/{name}.ogg'
-        ffmpeg_opts = {'options': f'-ss {start}'}
+        if start < 0:
+            await ctx.message.add_reaction('\U0001F615');
+            await ctx.send("Invalid timestamp.")
+            return
+
+        sound = self.library.find(name)
 
-        if not os.path.isfile(sound_path):
+        if not sound:
             if name == 'default':
                 await ctx.message.add_reaction('\U0001F615');
                 await ctx.send("No sound specified.")
@@ -101,21 +2215,8 @@ class VC(commands.Cog):
                 await ctx.send("Sound file not found.")
             return
         
-        audio = discord.FFmpegPCMAudio(executable=ffmpeg_path,
-                                       source=sound_path, **ffmpeg_opts)
-        sound = discord.PCMVolumeTransformer(audio)
-        
-        if not voice:
-            await self.join(ctx)
-
-        voice = discord.utils.get(self.bot.voice_clients, guild=ctx.guild)
-
-        if voice:
-            if voice.is_playing():
-                voice.stop()
-        
-        voice.play(sound)
-        await ctx.send(f"Playing `{name}.ogg`.")
+        await self.enqueue(ctx, SoundTrack(sound, start, self.frame_cache,
+                                           self.ffmpeg_pool))
 
     @sound.error
     async def sound_err(self, ctx, err):
@@ -123,13 +2224,123 @@ class VC(commands.Cog):
             await ctx.message.add_reaction('\U0001F615');
             await ctx.send(f"Invalid timestamp.")
 
+    @commands.command(aliases=['ov'])
+    async def overlay(self, ctx, name='default', volume:int=100):
+        """
+        Plays local sound over the current sound instead of queueing it.
+        Volume is a percentage for this sound alone.
+
+        Plays like $sound if nothing is playing.
+        """
+        voice = discord.utils.get(self.bot.voice_clients, guild=ctx.guild)
+        sound = self.library.find(name)
+
+        if not (ctx.author.voice or voice):
+            await ctx.message.add_reaction('\U0001F615')
+            await ctx.send("Not in a voice channel.")
+        elif not sound:
+            await ctx.message.add_reaction('\U0001F615');
+            await ctx.send("Sound file not found.")
+        elif not 0 <= volume <= 200:
+            await ctx.message.add_reaction('\U0001F615');
+            await ctx.send("Need a level between 0 and 200.")
+        elif not (voice and voice.is_playing()):
+            await self.enqueue(ctx, SoundTrack(sound, 0, self.frame_cache,
+                                               self.ffmpeg_pool))
+        else:
+            try:
+                track = SoundTrack(sound, pool=self.ffmpeg_pool)
+                await self.player(ctx.guild).overlay(track, volume / 100)
+                await ctx.send(f"Playing `{sound.name}.ogg` over the "
+                               "current sound.")
+            except MixerFullError:
+                await ctx.message.add_reaction('\U0001F615');
+                await ctx.send("Too many sounds playing at once.")
+
+    @overlay.error
+    async def overlay_err(self, ctx, err):
+        if isinstance(err, commands.errors.BadArgument):
+            await ctx.message.add_reaction('\U0001F615');
+            await ctx.send("Need a level between 0 and 200.")
+
+    @commands.command()
+    async def vcstats(self, ctx, *args):
+        """
+        Sends playback telemetry for this guild.
+        Use '-json' to get it as a JSON file instead.
+        """
+        data = self.telemetry(ctx.guild)
+
+        if '-json' in args:
+            dump = io.BytesIO(json.dumps(data, indent=1).encode())
+            await ctx.send(file=discord.File(dump, 'vcstats.json'))
+            return
+
+        stats = data['guilds'][str(ctx.guild.id)]
+        await ctx.send(
+            f"Tracks: {stats['tracks']}, frames: {stats['frames']}, "
+            f"underruns: {stats['underruns']}, stalls: {stats['stalls']}.\n"
+            f"Frame read: {stats['read_mean']:.2f} ms mean, "
+            f"{stats['read_p95']:.2f} ms p95, "
+            f"{stats['read_max']:.2f} ms max.\n"
+            f"Jitter: {stats['jitter_p50']:.2f} ms p50, "
+            f"{stats['jitter_p95']:.2f} ms p95, "
+            f"{stats['jitter_max']:.2f} ms max.\n"
+            f"Time to first frame: {stats['first_frame_p50']:.0f} ms p50, "
+            f"{stats['first_frame_max']:.0f} ms max.\n"
+            f"Event loop lag: {data['loop_lag_p50']:.2f} ms p50, "
+            f"{data['loop_lag_p95']:.2f} ms p95, "
+            f"{data['loop_lag_max']:.2f} ms max.\n"
+            + '\n'.join(data['caches']))
+
+    @commands.command(aliases=['snds'])
+    async def sounds(self, ctx, prefix=''):
+        """
+        Lists local sounds and their lengths.
+        Lists only sounds starting with prefix if given.
+        Use '-stats' to see sound cache memory use.
+        """
+        if prefix == '-stats':
+            gained = sum(bool(sound.gain) for sound in self.library)
+            await ctx.send(f"Sounds indexed: {len(self.library)}, "
+                           f"{gained} with loudness gain.\n"
+                           f"{self.frame_cache.stats()}\n"
+                           f"{self.ffmpeg_pool.stats()}")
+            return
+
+        key = normalize_sound(prefix)
+        lines = []
+
+        for sound in self.library:
+            if normalize_sound(sound.name).startswith(key):
+                minutes, seconds = divmod(round(sound.duration), 60)
+                lines.append(f"`{sound.name}` {minutes}:{seconds:02}")
+
+        if not lines:
+            await ctx.message.add_reaction('\U0001F615')
+            await ctx.send("No sounds found.")
+            return
+
+        # keep each message under Discord's 2000 character limit
+        message = ''
+
+        for line in lines:
+            if len(message) + len(line) >= 2000:
+                await ctx.send(message)
+                message = ''
+
+            message += line + '\n'
+
+        await ctx.send(message)
+
     @commands.command()
     async def stop(self, ctx):
-        """Stops currently playing sound."""
+        """Stops currently playing sound and clears the queue."""
         voice = discord.utils.get(self.bot.voice_clients, guild=ctx.guild)
 
         if voice:
             if voice.is_playing():
+                self.player(ctx.guild).clear()
                 voice.stop()
                 await ctx.send("Playing stopped.") 
             else:
@@ -141,13 +2352,13 @@ class VC(commands.Cog):
 
     @commands.command(aliases=['vol'])
     async def volume(self, ctx, level:int):
-        """Adjusts volume of current sound."""
+        """Adjusts volume of current and queued sounds."""
         voice = discord.utils.get(self.bot.voice_clients, guild=ctx.guild)
 
         if voice:
             if voice.is_playing():
                 if 0 <= level <= 200:
-                    voice.source.volume = level / 100
+                    self.player(ctx.guild).set_volume(level / 100)
                     await ctx.send(f"Adjusted volume to {level}%.")
             else:
                 await ctx.message.add_reaction('\U0001F615')
@@ -168,56 +2379,64 @@ class VC(commands.Cog):
     @commands.command(aliases=['yt'])
     async def youtube(self, ctx, *search):
         """
-        Plays YouTube video.
+        Plays YouTube video or playlist.
         Takes first result from YouTube search if valid URL not detected.
+        Playlist entries are looked up one at a time as they come up.
+        Use '-stats' to see lookup cache performance.
 
         Joins author's voice channel if not in one.
-        Interrupts current sound if necessary.
+        Queues video if another sound is playing.
         """
+        search = ' '.join(search)
+
+        if search == '-stats':
+            await ctx.send(f"{self.extract_cache.stats()}\n"
+                           f"{self.track_cache.stats()}")
+            return
+
         voice = discord.utils.get(self.bot.voice_clients, guild=ctx.guild)
 
         if not (ctx.author.voice or voice):
             await ctx.message.add_reaction('\U0001F615')
             await ctx.send("Not in a voice channel.")
             return
-        
-        YDL_OPTS = {'default_search': 'auto', 'format': 'bestaudio',
-                    'noplaylist': 'True'}
-        FFMPEG_OPTS = {'before_options': '-reconnect 1 -reconnect_streamed 1 '
-                       '-reconnect_delay_max 5',
-                       'options': '-vn'}
-        
-        with youtube_dl.YoutubeDL(YDL_OPTS) as ydl:
-            try:
-                info = ydl.extract_info(' '.join(search), download=False)
-            except youtube_dl.utils.DownloadError:
-                await ctx.message.add_reaction('\U0001F615');
-                await ctx.send(f"Couldn't stream that sound.")
-                return
 
-        if 'entries' in info:
-            if info['entries']:
-                info = info['entries'][0]
-            else:
-                await ctx.send(f"No results found for `{search}`.")
-                return
-        
-        if not voice:
-            await ctx.message.add_reaction('\U0001F615')
-            await self.join(ctx)
+        # a known video with a cached copy needs no lookup at all
+        info = self.extract_cache.peek(query_key(search))
+        playlist = None
 
-        voice = discord.utils.get(self.bot.voice_clients, guild=ctx.guild)
-        
-        if voice:
-            if voice.is_playing():
-                voice.stop()
-        
-        URL = info['formats'][0]['url']
-        title = info['title']
-        voice.play(discord.FFmpegPCMAudio(executable=os.environ['FFMPEG_PATH'],
-                                          source=URL, **FFMPEG_OPTS))
-        
-        await ctx.send(f"Playing `{title}`.")
+        try:
+            if 'list=' in search:
+                async with ctx.typing():
+                    playlist = await self.run_blocking(extract_playlist,
+                                                       search)
+
+            cached = info and info['id'] in self.track_cache.tracks
+
+            if not (playlist or cached):
+                async with ctx.typing():
+                    info = await self.resolve(search)
+        except youtube_dl.utils.DownloadError:
+            await ctx.message.add_reaction('\U0001F615');
+            await ctx.send(f"Couldn't stream that sound.")
+            return
+        except ExtractorBusyError:
+            await ctx.message.add_reaction('\U0001F916');
+            await ctx.send("Too many YouTube requests right now. "
+                           "Try again shortly.")
+            return
+        except asyncio.TimeoutError:
+            await ctx.message.add_reaction('\U0001F916');
+            await ctx.send("YouTube timed out.")
+            return
+
+        if playlist:
+            await self.enqueue(ctx, Playlist(*playlist, self.run_blocking,
+                                             self.playlist_track))
+        elif info:
+            await self.enqueue(ctx, self.track_for(info))
+        else:
+            await ctx.send(f"No results found for `{search}`.")
 
     @youtube.error
     async def yt_err(self, ctx, err):
@@ -232,7 +2451,8 @@ class VC(commands.Cog):
         if isinstance(err, commands.errors.CheckFailure):
             await ctx.message.add_reaction('\U0001F615')
             await ctx.send("Not in a guild.")
-        elif (isinstance(err, commands.ConversionError)
+        elif (isinstance(err, (commands.ConversionError,
+                               commands.CommandInvokeError))
                 and isinstance(err.original, discord.errors.ClientException)):
             await ctx.message.add_reaction('\U0001F916')
             await ctx.send("Couldn't play sound due to missing dependency.")
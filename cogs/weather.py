@@ -1,15 +1,392 @@
 # weather.py
 import os
+import asyncio
+import functools
+import json
+import sqlite3
+import threading
+import time
 import discord
 import dotenv
-import geopy, geopy.geocoders
-import pyowm
+import geopy, geopy.adapters, geopy.geocoders
+import pyowm, pyowm.utils.config
 import pytz
 
-from datetime import datetime
-from discord.ext import commands
+from collections import Counter, OrderedDict, defaultdict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from discord.ext import commands, tasks
 from discord import Embed
 
+# cache settings
+WEATHER_DB = os.getenv('WEATHER_DB', 'weather.db')
+GEOCODE_CACHE_SIZE = int(os.getenv('GEOCODE_CACHE_SIZE', 256)) # entries
+GEOCODE_DB_ROWS = int(os.getenv('GEOCODE_DB_ROWS', 10000)) # entries
+GEOCODE_TTL = float(os.getenv('GEOCODE_TTL', 30 * 24 * 3600)) # s
+ONECALL_CACHE_SIZE = int(os.getenv('ONECALL_CACHE_SIZE', 128)) # entries
+ONECALL_TTL = float(os.getenv('ONECALL_TTL', 600)) # s
+ONECALL_MAX_AGE = float(os.getenv('ONECALL_MAX_AGE', 3600)) # s
+
+# most requested places are refreshed in the background
+WEATHER_HOT_PLACES = int(os.getenv('WEATHER_HOT_PLACES', 5)) # places
+WEATHER_REFRESH_INTERVAL = float(os.getenv('WEATHER_REFRESH_INTERVAL',
+                                           300)) # s
+
+# blocking API calls run in a bounded thread pool
+WEATHER_WORKERS = int(os.getenv('WEATHER_WORKERS', 4)) # threads
+WEATHER_QUEUE_DEPTH = int(os.getenv('WEATHER_QUEUE_DEPTH', 16)) # calls
+WEATHER_TIMEOUT = float(os.getenv('WEATHER_TIMEOUT', 10)) # s
+
+# places in one comparison and how many are looked up at once
+COMPARE_LIMIT = int(os.getenv('COMPARE_LIMIT', 9)) # places
+COMPARE_CONCURRENCY = int(os.getenv('COMPARE_CONCURRENCY', 4)) # lookups
+
+# upstream quotas, enforced with token buckets
+OWM_CALLS_PER_MINUTE = float(os.getenv('OWM_CALLS_PER_MINUTE', 50))
+OWM_BURST = int(os.getenv('OWM_BURST', 10)) # calls
+BING_CALLS_PER_MINUTE = float(os.getenv('BING_CALLS_PER_MINUTE', 100))
+BING_BURST = int(os.getenv('BING_BURST', 20)) # calls
+QUOTA_MAX_WAIT = float(os.getenv('QUOTA_MAX_WAIT', 5)) # s
+QUOTA_RESERVE = float(os.getenv('QUOTA_RESERVE', 0.5)) # kept for users
+
+# subscription deliveries are spaced out to respect Discord rate limits
+SUBSCRIPTION_SEND_RATE = float(os.getenv('SUBSCRIPTION_SEND_RATE',
+                                         20)) # messages/s
+SUBSCRIPTION_LIMIT = int(os.getenv('SUBSCRIPTION_LIMIT', 10)) # per channel
+
+# One Call data fetched once per location and shared by every forecast view
+ONECALL_EXCLUDE = 'minutely'
+
+class WeatherBusyError(Exception):
+    """Raised when too many weather API calls are already pending."""
+
+class QuotaExceededError(Exception):
+    """Raised when an upstream API's call budget is exhausted."""
+
+class TokenBucket:
+    """
+    Token bucket limiting calls to an upstream API.
+    Tracks usage, rejections and time spent waiting for quota.
+    """
+    def __init__(self, name, per_minute, burst):
+        self.name = name
+        self.rate = per_minute / 60 # tokens/s
+        self.capacity = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.used = 0
+        self.rejected = 0
+        self.waits = 0
+        self.waited = 0.0 # s
+
+    def refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity,
+                          self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def drain(self):
+        """Empties the bucket after the upstream API reports a rate limit."""
+        self.refill()
+        self.tokens = min(self.tokens, 0)
+
+    async def acquire(self, max_wait=0, reserve=0):
+        """
+        Accepts seconds to wait and number of tokens to leave for others.
+        Takes a token, waiting for one to be refilled if necessary.
+
+        Waiting callers queue in order by borrowing against future tokens.
+        Raises QuotaExceededError if the wait would exceed max_wait.
+        """
+        self.refill()
+        wait = max(0, (reserve + 1 - self.tokens) / self.rate)
+
+        if wait > max_wait:
+            self.rejected += 1
+            raise QuotaExceededError(f"{self.name} quota exhausted")
+
+        self.tokens -= 1
+        self.used += 1
+
+        if wait:
+            self.waits += 1
+            self.waited += wait
+            await asyncio.sleep(wait)
+
+    def stats(self):
+        """Returns summary of quota usage."""
+        self.refill()
+        avg_wait = self.waited / self.waits if self.waits else 0
+
+        return (f"{self.name} quota: {self.used} calls, {self.rejected} "
+                f"rejected, {self.waits} waited (avg {avg_wait:.1f} s), "
+                f"{max(self.tokens, 0):.0f}/{self.capacity} left.")
+
+class TTLCache:
+    """
+    In-memory LRU cache whose entries expire after a time-to-live.
+    Counts hits and misses.
+    """
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key):
+        """
+        Accepts cache key.
+        Returns cached value, or None if missing or expired.
+        """
+        entry = self.entries.get(key)
+
+        if entry and time.time() - entry[0] < self.ttl:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+        # expired entries linger as a last resort until evicted
+        self.misses += 1
+        return None
+
+    def peek(self, key):
+        """
+        Accepts cache key.
+        Returns cached value regardless of age, or None if missing.
+        """
+        entry = self.entries.get(key)
+        return entry[1] if entry else None
+
+    def put(self, key, value, created=None):
+        """
+        Accepts cache key, value and optional creation timestamp.
+        Evicts least recently used entries past the size limit.
+        """
+        self.entries[key] = (created or time.time(), value)
+        self.entries.move_to_end(key)
+
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def age(self, key):
+        """
+        Accepts cache key.
+        Returns seconds since the entry was cached, or None if missing.
+        """
+        entry = self.entries.get(key)
+        return time.time() - entry[0] if entry else None
+
+    def clear(self):
+        self.entries.clear()
+
+    def stats(self, name):
+        """
+        Accepts cache name.
+        Returns summary of cache performance.
+        """
+        total = self.hits + self.misses
+        rate = round(self.hits / total * 100) if total else 0
+
+        return (f"{name}: {self.hits} hits, {self.misses} misses, "
+                f"{rate}% hit rate, {len(self)} entries.")
+
+class GeocodeCache:
+    """
+    Geocoding cache keyed by normalized place query.
+    Keeps recent locations in memory and persists all of them to SQLite.
+    Memory hits update access times on disk in batches, so the disk keeps
+    its least recently used order without a write per hit.
+    """
+    def __init__(self, path=WEATHER_DB, *, maxsize=GEOCODE_CACHE_SIZE,
+                 max_rows=GEOCODE_DB_ROWS, ttl=GEOCODE_TTL):
+        self.memory = TTLCache(maxsize, ttl)
+        self.max_rows = max_rows
+        self.ttl = ttl
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.touched = {} # query: access time not yet written
+        
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute('CREATE TABLE IF NOT EXISTS geocode ('
+                        'query TEXT PRIMARY KEY, address TEXT, '
+                        'latitude REAL, longitude REAL, raw TEXT, '
+                        'created REAL, accessed REAL)')
+        self.db.execute('DELETE FROM geocode WHERE created < ?',
+                        (time.time() - ttl,))
+        self.db.commit()
+
+    def get(self, query):
+        """
+        Accepts place search string.
+        Returns cached geopy Location, or None if not cached.
+        """
+        key = normalize_place(query)
+        loc = self.memory.get(key)
+
+        if loc:
+            self.touched[key] = time.time()
+            self.hits += 1
+            return loc
+        
+        now = time.time()
+        row = self.db.execute('SELECT address, latitude, longitude, raw, '
+                              'created FROM geocode WHERE query = ? '
+                              'AND created >= ?',
+                              (key, now - self.ttl)).fetchone()
+
+        if not row:
+            self.misses += 1
+            return None
+
+        address, lat, lon, raw, created = row
+        loc = geopy.location.Location(address, (lat, lon), json.loads(raw))
+        self.memory.put(key, loc, created)
+        self.touched[key] = now
+        self.flush()
+        self.hits += 1
+        self.disk_hits += 1
+        
+        return loc
+
+    def put(self, query, loc):
+        """
+        Accepts place search string and geopy Location.
+        Evicts least recently used rows past the size limit.
+        """
+        key = normalize_place(query)
+        now = time.time()
+        self.memory.put(key, loc, now)
+        self.db.execute('INSERT OR REPLACE INTO geocode '
+                        'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                        (key, loc.address, loc.latitude, loc.longitude,
+                         json.dumps(loc.raw), now, now))
+        self.touched.pop(key, None)
+        self.flush(commit=False)
+        self.db.execute('DELETE FROM geocode WHERE query IN ('
+                        'SELECT query FROM geocode ORDER BY accessed DESC '
+                        'LIMIT -1 OFFSET ?)', (self.max_rows,))
+        self.db.commit()
+
+    def stats(self):
+        """Returns summary of cache performance."""
+        total = self.hits + self.misses
+        rate = round(self.hits / total * 100) if total else 0
+        
+        return (f"Geocode cache: {self.hits} hits ({self.disk_hits} from "
+                f"disk), {self.misses} misses, {rate}% hit rate, "
+                f"{len(self.memory)} in memory.")
+
+    def flush(self, commit=True):
+        """Writes access times of hits since the last flush."""
+        touched, self.touched = self.touched, {}
+        self.db.executemany('UPDATE geocode SET accessed = ? WHERE query = ?',
+                            [(t, key) for key, t in touched.items()])
+
+        if commit:
+            self.db.commit()
+
+    def close(self):
+        self.flush()
+        self.db.close()
+
+Subscription = namedtuple('Subscription',
+                          'id channel place period time timezone')
+
+class Subscriptions:
+    """
+    Scheduled forecast subscriptions persisted to SQLite.
+    Indexed in memory by timezone and local time of day.
+    """
+    def __init__(self, path=WEATHER_DB):
+        self.schedule = defaultdict(lambda: defaultdict(list))
+        self.db = sqlite3.connect(path)
+        self.db.execute('CREATE TABLE IF NOT EXISTS subscription ('
+                        'id INTEGER PRIMARY KEY, channel INTEGER, '
+                        'place TEXT, period TEXT, time TEXT, timezone TEXT)')
+        self.db.commit()
+
+        for row in self.db.execute('SELECT * FROM subscription'):
+            self.index(Subscription(*row))
+
+    def __len__(self):
+        return sum(len(subs) for times in self.schedule.values()
+                   for subs in times.values())
+
+    def index(self, sub):
+        self.schedule[sub.timezone][sub.time].append(sub)
+
+    def add(self, channel, place, period, time, timezone):
+        """
+        Accepts channel ID, place, period flag, local time and timezone.
+        Returns new Subscription.
+        """
+        cur = self.db.execute('INSERT INTO subscription (channel, place, '
+                              'period, time, timezone) '
+                              'VALUES (?, ?, ?, ?, ?)',
+                              (channel, place, period, time, timezone))
+        self.db.commit()
+        sub = Subscription(cur.lastrowid, channel, place, period, time,
+                           timezone)
+        self.index(sub)
+        
+        return sub
+
+    def remove(self, channel, sub_id=None):
+        """
+        Accepts channel ID and optional subscription ID.
+        Removes matching subscriptions and returns how many were removed.
+
+        Removes all of the channel's subscriptions by default.
+        """
+        removed = 0
+
+        for times in self.schedule.values():
+            for time, subs in times.items():
+                keep = [sub for sub in subs if not (sub.channel == channel
+                        and sub_id in (None, sub.id))]
+                removed += len(subs) - len(keep)
+                times[time] = keep
+
+        if sub_id is None:
+            self.db.execute('DELETE FROM subscription WHERE channel = ?',
+                            (channel,))
+        else:
+            self.db.execute('DELETE FROM subscription WHERE channel = ? '
+                            'AND id = ?', (channel, sub_id))
+        
+        self.db.commit()
+        return removed
+
+    def for_channel(self, channel):
+        """
+        Accepts channel ID.
+        Returns list of the channel's subscriptions.
+        """
+        return [sub for times in self.schedule.values()
+                for subs in times.values() for sub in subs
+                if sub.channel == channel]
+
+    def due(self, moment):
+        """
+        Accepts timezone-aware datetime.
+        Returns list of subscriptions scheduled for that minute.
+        """
+        due = []
+
+        for timezone, times in self.schedule.items():
+            local = moment.astimezone(pytz.timezone(timezone))
+            due.extend(times.get(local.strftime('%H:%M'), []))
+
+        return due
+
+    def close(self):
+        self.db.close()
+
 def compass_dir(angle):
     """
     Accepts angle in degrees.
@@ -50,34 +427,19 @@ def compass_dir(angle):
     elif angle < 348.75:
         return 'NNW'
 
-async def get_obs_loc(place='', *, exclude=''):
+def location_key(lat, lon):
     """
-    Accepts place and JSON arguments for One Call data to ignore.
-    Returns tuple with PyOWM OneCall and geopy Location.
-
-    Default place is Toronto, ON.
-
-    Observation taken using OWM One Call API.
-    https://openweathermap.org/api/one-call-api
-    
-    Geocoding performed with Bing Maps Location API.
-    https://docs.microsoft.com/en-us/bingmaps/rest-services/locations/
+    Accepts latitude and longitude.
+    Returns coordinates rounded to about 1 km for use as a cache key.
     """
-    # set up weather manager
-    dotenv.load_dotenv()
-    owm = pyowm.OWM(os.environ['OWM_TOKEN'])
-    mgr = owm.weather_manager()
-
-    # default place is Toronto, ON
-    if not place.strip():
-        place = 'Toronto, ON'
+    return round(lat, 2), round(lon, 2)
 
-    # find location from search string using Bing Maps
-    geocoder = geopy.geocoders.Bing(os.getenv('BING_MAPS_TOKEN'))
-    l = geocoder.geocode(place, exactly_one=True, culture='en')
-    
-    # return weather data and location
-    return mgr.one_call(l.latitude, l.longitude, exclude=exclude), l
+def normalize_place(place):
+    """
+    Accepts place search string.
+    Returns case-, comma- and whitespace-insensitive cache key.
+    """
+    return ' '.join(place.casefold().replace(',', ' ').split())
 
 def uv_emoji(uv):
     """
@@ -143,195 +505,261 @@ def weather_emoji(code):
     else:
         raise ValueError(f"Unrecognized weather ID: '{code}'.")
 
-def current_weather_embed(obs, loc):
+@functools.lru_cache(maxsize=None)
+def get_timezone(name):
+    """
+    Accepts IANA timezone name.
+    Returns cached pytz timezone.
+    """
+    return pytz.timezone(name)
+
+def celsius(kelvin):
     """
-    Accepts pyowm OneCall and geopy Location.
+    Accepts temperature in kelvin.
+    Returns temperature in °C rounded to the nearest degree.
+    """
+    return int(round(kelvin - 273.15))
+
+def location_name(loc):
+    """
+    Accepts geopy Location.
+    Returns Bing Maps formatted address.
+    """
+    return loc.raw['address']['formattedAddress']
+
+class Forecast:
+    """
+    Parsed One Call data shared by every forecast view.
+
+    Built once per observation. Each period's values are converted and
+    formatted in one pass the first time any view needs them, and built
+    embeds are memoized per location.
+    """
+    def __init__(self, obs):
+        self.obs = obs
+        self.timezone = obs.timezone
+        self.tz = get_timezone(obs.timezone)
+        self.embeds = {}
+
+        time = self.local(obs.current.reference_time())
+        self.retrieved = (f"Retrieved: {time.strftime('%Y-%m-%d %I:%M %p')} "
+                          f"({obs.timezone})")
+
+    def local(self, timestamp):
+        """
+        Accepts UNIX timestamp.
+        Returns datetime in the observation's timezone.
+        """
+        return datetime.fromtimestamp(timestamp, self.tz)
+
+    def render(self, build, loc):
+        """
+        Accepts embed builder and geopy Location.
+        Returns Embed, building it only the first time it's requested.
+        """
+        key = (build, location_name(loc))
+
+        if key not in self.embeds:
+            self.embeds[key] = build(self, loc)
+
+        return self.embeds[key]
+
+    @functools.cached_property
+    def current(self):
+        """Current conditions."""
+        w = self.obs.current
+        wind = w.wind()
+        uv = round(w.uvi) # index
+
+        return {'temp': celsius(w.temp['temp']),
+                'feels_like': celsius(w.temp['feels_like']),
+                'emoji': weather_emoji(w.weather_code),
+                'pop': int(round(self.obs.forecast_hourly[0]
+                                  .precipitation_probability * 100)), # %
+                'wind_speed': round(float(wind['speed']) * 3.6), # km/h
+                'wind_dir': compass_dir(wind['deg']),
+                'humidity': w.humidity, # %
+                'uv': uv,
+                'uv_color': uv_emoji(uv),
+                'dew_point': celsius(w.dewpoint),
+                'visibility': round(w.visibility_distance / 1000, 1), # km
+                'pressure': round(float(w.pressure['press']) * 0.1, 1), # kPa
+                'sunrise': self.local(w.sunrise_time()).strftime('%-I:%M %p'),
+                'sunset': self.local(w.sunset_time()).strftime('%-I:%M %p')}
+
+    @functools.cached_property
+    def hourly(self):
+        """List of hourly forecasts."""
+        return [{'hour': self.local(f.reference_time()).strftime('%-I %p'),
+                 'temp': celsius(f.temp['temp']),
+                 'emoji': weather_emoji(f.weather_code),
+                 'pop': int(round(f.precipitation_probability * 100))} # %
+                for f in self.obs.forecast_hourly]
+
+    @functools.cached_property
+    def daily(self):
+        """List of daily forecasts."""
+        days = []
+
+        for f in self.obs.forecast_daily:
+            date = self.local(f.reference_time())
+            t = f.temp
+            uv = round(f.uvi) # index
+            
+            days.append({
+                'date': date.strftime('%a %b %-d'),
+                'long_date': date.strftime('%A, %B %-d'),
+                'day': celsius(t['day']),
+                'feels_like': celsius(t['feels_like_day']),
+                'morn': celsius(t['morn']),
+                'eve': celsius(t['eve']),
+                'night': celsius(t['night']),
+                'emoji': weather_emoji(f.weather_code),
+                'pop': int(round(f.precipitation_probability * 100)), # %
+                'humidity': f.humidity, # %
+                'uv': uv,
+                'uv_color': uv_emoji(uv),
+                'sunrise': self.local(f.sunrise_time()).strftime('%-I:%M %p'),
+                'sunset': self.local(f.sunset_time()).strftime('%-I:%M %p')})
+
+        return days
+
+def current_weather_embed(fc, loc):
+    """
+    Accepts Forecast and geopy Location.
     Returns Embed for weather report.
     """
-    # weather details
-    w = obs.current
-    loc_str = loc.raw['address']['formattedAddress']
-    tz = pytz.timezone(obs.timezone)
-    time = datetime.fromtimestamp(w.reference_time(), tz)
-    time_str = time.strftime('%Y-%m-%d %I:%M %p')
-    
-    t = w.temperature('celsius') # °C
-    temp = int(round(t['temp'])) # °C
-    status_emoji = weather_emoji(w.weather_code)
-    feels_like = int(round(t['feels_like'])) # °C
-    pop = int(round(obs.forecast_hourly[0].precipitation_probability * 100)) # %
-
-    wind_speed = round(float(w.wind()['speed']) * 3.6) # m/s -> km/h
-    wind_dir = compass_dir(w.wind()['deg']) # °
-    humidity = w.humidity # %
-    uv = round((w.uvi)) # index
-    uv_color = uv_emoji(uv)
-    
-    dew_point = int(round(w.dewpoint - 273.15)) # K -> °C
-    visibility = round(w.visibility_distance / 1000, 1) # m -> km
-    pressure = round(float(w.pressure['press']) * 0.1, 1) # hPa -> kPa
-    
-    sunrise = datetime.fromtimestamp(w.sunrise_time(), tz)
-    sunset = datetime.fromtimestamp(w.sunset_time(), tz)
+    c = fc.current
     
     # build embed
-    embed = Embed(title=loc_str)
-    embed.add_field(name='At a glance', value=f'{temp}°C {status_emoji}',
+    embed = Embed(title=location_name(loc))
+    embed.add_field(name='At a glance', value=f"{c['temp']}°C {c['emoji']}",
                     inline=True)
-    embed.add_field(name='Feels like', value=f'{feels_like}°C',
+    embed.add_field(name='Feels like', value=f"{c['feels_like']}°C",
                     inline=True)
-    embed.add_field(name='POP', value=f'{pop}%', inline=True)
+    embed.add_field(name='POP', value=f"{c['pop']}%", inline=True)
     
-    embed.add_field(name='Wind speed', value=f'{wind_speed} km/h {wind_dir}',
+    embed.add_field(name='Wind speed',
+                    value=f"{c['wind_speed']} km/h {c['wind_dir']}",
+                    inline=True)
+    embed.add_field(name='Humidity', value=f"{c['humidity']}%", inline=True)
+    embed.add_field(name='UV index', value=f"{c['uv']} {c['uv_color']}",
                     inline=True)
-    embed.add_field(name='Humidity', value=f'{humidity}%', inline=True)
-    embed.add_field(name='UV index', value=f'{uv} {uv_color}', inline=True)
-    
-    embed.add_field(name='Dew point', value=f'{dew_point}°C', inline=True)
-    embed.add_field(name='Visibility', value=f'{visibility} km', inline=True)
-    embed.add_field(name='Pressure', value=f'{pressure} kPa', inline=True)
     
-    embed.add_field(name='Sunrise', value=sunrise.strftime('%-I:%M %p'),
+    embed.add_field(name='Dew point', value=f"{c['dew_point']}°C",
                     inline=True)
-    embed.add_field(name='Sunset', value=sunset.strftime('%-I:%M %p'),
+    embed.add_field(name='Visibility', value=f"{c['visibility']} km",
                     inline=True)
+    embed.add_field(name='Pressure', value=f"{c['pressure']} kPa",
+                    inline=True)
+    
+    embed.add_field(name='Sunrise', value=c['sunrise'], inline=True)
+    embed.add_field(name='Sunset', value=c['sunset'], inline=True)
     embed.add_field(name='\u200b', value='\u200b', inline=True)
-    embed.set_footer(text=f"Retrieved: {time_str} ({obs.timezone})")
+    embed.set_footer(text=fc.retrieved)
     
     return embed
 
-def daily_forecast_embed(obs, loc):
+def daily_forecast_embed(fc, loc):
     """
-    Accepts pyowm OneCall and geopy Location.
+    Accepts Forecast and geopy Location.
     Returns Embed for 7-day forecast.
     """
-    # forecast details
-    forecasts = obs.forecast_daily
-    loc_str = loc.raw['address']['formattedAddress']
-    tz = pytz.timezone(obs.timezone)
-    time = datetime.fromtimestamp(obs.current.reference_time(), tz)
-    time_str = time.strftime('%Y-%m-%d %I:%M %p')
-
-    days = []
-    data = []
-
-    for f in forecasts:
-        date = datetime.fromtimestamp(f.reference_time(), tz)
-        date_str = date.strftime('%a %b %-d')
-        t = f.temperature('celsius')
-        day_temp = int(round(t['day'])) # °C
-        night_temp = int(round(t['night'])) # °C
-        status_emoji = weather_emoji(f.weather_code)
-        pop = int(round(f.precipitation_probability * 100)) # -> %
-        
-        days.append(date_str)
-        data.append(f"{status_emoji}\nDay: {day_temp}°C\n"
-                    f"Night: {night_temp}°C\nPOP: {pop}%")
-
     # build embed
-    embed = Embed(title=loc_str,description='Daily Forecast')
+    embed = Embed(title=location_name(loc), description='Daily Forecast')
     
-    for i in range(8):
-        embed.add_field(name=days[i], value=data[i], inline=True)
+    for d in fc.daily[:8]:
+        embed.add_field(name=d['date'],
+                        value=f"{d['emoji']}\nDay: {d['day']}°C\n"
+                              f"Night: {d['night']}°C\nPOP: {d['pop']}%",
+                        inline=True)
     
     embed.add_field(name='\u200b', value='\u200b', inline=True)
-    embed.set_footer(text=f"Retrieved: {time_str} ({obs.timezone})")
+    embed.set_footer(text=fc.retrieved)
     
     return embed
 
-def hourly_forecast_embed(obs, loc):
+def hourly_forecast_embed(fc, loc):
     """
-    Accepts pyowm OneCall and geopy Location.
+    Accepts Forecast and geopy Location.
     Returns Embed for 12-hour forecast.
     """
-    # forecast details
-    forecasts = obs.forecast_hourly[:12]
-    loc_str = loc.raw['address']['formattedAddress']
-    tz = pytz.timezone(obs.timezone)
-    time = datetime.fromtimestamp(obs.current.reference_time(), tz)
-    time_str = time.strftime('%Y-%m-%d %I:%M %p')
-
-    hours = []
-    data = []
-    
-    for f in forecasts:
-        tz = pytz.timezone(obs.timezone)
-        hour = datetime.fromtimestamp(f.reference_time(), tz)
-        hour_str = hour.strftime('%-I %p')
-        temp = int(round(f.temperature('celsius')['temp'])) # °C
-        status_emoji = weather_emoji(f.weather_code)
-        pop = int(round(f.precipitation_probability * 100)) # -> %
-        
-        hours.append(hour_str)
-        data.append(f"{status_emoji}\n{temp}°C\nPOP: {pop}%")
-
     # build embed
-    embed = Embed(title=loc_str, description='Hourly Forecast')
+    embed = Embed(title=location_name(loc), description='Hourly Forecast')
 
-    for i in range(12):
-        embed.add_field(name=hours[i], value=data[i], inline=True)
+    for h in fc.hourly[:12]:
+        embed.add_field(name=h['hour'],
+                        value=f"{h['emoji']}\n{h['temp']}°C\n"
+                              f"POP: {h['pop']}%",
+                        inline=True)
     
-    embed.set_footer(text=f"Retrieved: {time_str} ({obs.timezone})")
+    embed.set_footer(text=fc.retrieved)
     
     return embed
 
-def tomorrow_forecast_embed(obs, loc):
+def tomorrow_forecast_embed(fc, loc):
     """
-    Accepts pyowm OneCall and geopy Location.
+    Accepts Forecast and geopy Location.
     Returns Embed for tomorrow's forecast.
     """
-    # weather details
-    w = obs.forecast_daily[1]
-    loc_str = loc.raw['address']['formattedAddress']
-    tz = pytz.timezone(obs.timezone)
-    time = datetime.fromtimestamp(obs.current.reference_time(), tz)
-    time_str = time.strftime('%Y-%m-%d %I:%M %p')
-
-    date = datetime.fromtimestamp(w.reference_time(), tz)
-    date_str = date.strftime('%A, %B %-d')
-    
-    t = w.temperature('celsius') # °C
-    day_temp = int(round(t['day'])) # °C
-    status_emoji = weather_emoji(w.weather_code)
-    feels_like = int(round(t['feels_like_day'])) # °C
-    pop = int(round(w.precipitation_probability * 100)) # %
-    
-    morn_temp = int(round(t['morn'])) # °C
-    eve_temp = int(round(t['eve'])) # °C
-    night_temp = int(round(t['night'])) # °C
-    
-    humidity = w.humidity # %
-    uv = round((w.uvi)) # index
-    uv_color = uv_emoji(uv)
-    
-    sunrise = datetime.fromtimestamp(w.sunrise_time(), tz)
-    sunset = datetime.fromtimestamp(w.sunset_time(), tz)
+    d = fc.daily[1]
     
     # build embed
-    embed = Embed(title=loc_str, description=f'Forecast for {date_str}')
-    embed.add_field(name='At a glance', value=f'{day_temp}°C {status_emoji}',
+    embed = Embed(title=location_name(loc),
+                  description=f"Forecast for {d['long_date']}")
+    embed.add_field(name='At a glance', value=f"{d['day']}°C {d['emoji']}",
                     inline=True)
-    embed.add_field(name='Feels like', value=f'{feels_like}°C',
+    embed.add_field(name='Feels like', value=f"{d['feels_like']}°C",
                     inline=True)
-    embed.add_field(name='POP', value=f'{pop}%', inline=True)
+    embed.add_field(name='POP', value=f"{d['pop']}%", inline=True)
     
-    embed.add_field(name='Morning', value=f'{morn_temp}°C', inline=True)
-    embed.add_field(name='Evening', value=f'{eve_temp}°C', inline=True)
-    embed.add_field(name='Night', value=f'{night_temp}°C', inline=True)
+    embed.add_field(name='Morning', value=f"{d['morn']}°C", inline=True)
+    embed.add_field(name='Evening', value=f"{d['eve']}°C", inline=True)
+    embed.add_field(name='Night', value=f"{d['night']}°C", inline=True)
 
-    embed.add_field(name='Humidity', value=f'{humidity}%', inline=True)
-    embed.add_field(name='UV index', value=f'{uv} {uv_color}', inline=True)
+    embed.add_field(name='Humidity', value=f"{d['humidity']}%", inline=True)
+    embed.add_field(name='UV index', value=f"{d['uv']} {d['uv_color']}",
+                    inline=True)
     embed.add_field(name='\u200b', value='\u200b', inline=True)
     
-    embed.add_field(name='Sunrise', value=sunrise.strftime('%-I:%M %p'),
-                    inline=True)
-    embed.add_field(name='Sunset', value=sunset.strftime('%-I:%M %p'),
-                    inline=True)
+    embed.add_field(name='Sunrise', value=d['sunrise'], inline=True)
+    embed.add_field(name='Sunset', value=d['sunset'], inline=True)
     embed.add_field(name='\u200b', value='\u200b', inline=True)
-    embed.set_footer(text=f"Retrieved: {time_str} ({obs.timezone})")
+    embed.set_footer(text=fc.retrieved)
     
     return embed
 
+def comparison_embed(results):
+    """
+    Accepts list of (place, Forecast, geopy Location) tuples.
+    Forecast and Location are None where the lookup failed.
+    Returns Embed comparing current conditions.
+    """
+    embed = Embed(title='Weather Comparison')
+
+    for place, fc, loc in results:
+        if fc:
+            c = fc.current
+            embed.add_field(name=location_name(loc),
+                            value=f"{c['temp']}°C {c['emoji']}\n"
+                                  f"Feels like: {c['feels_like']}°C\n"
+                                  f"POP: {c['pop']}%\n"
+                                  f"Wind: {c['wind_speed']} km/h "
+                                  f"{c['wind_dir']}",
+                            inline=True)
+        else:
+            embed.add_field(name=place, value='Unavailable', inline=True)
+
+    # pad last row so fields line up
+    for i in range(-len(results) % 3):
+        embed.add_field(name='\u200b', value='\u200b', inline=True)
+
+    return embed
+
+# forecast periods available to subscriptions
+SUBSCRIPTION_PERIODS = {'-7d': ('daily', daily_forecast_embed),
+                        '-12h': ('hourly', hourly_forecast_embed)}
+
 class Weather(commands.Cog):
     """
     Cog wrapping weather-related commands.
@@ -341,6 +769,446 @@ class Weather(commands.Cog):
     """
     def __init__(self, bot):
         self.bot = bot
+
+        # long-lived API clients, each with its own keep-alive session
+        dotenv.load_dotenv()
+        owm_config = pyowm.utils.config.get_default_config()
+        owm_config['connection']['max_retries'] = 0
+        self.mgr = pyowm.OWM(os.getenv('OWM_TOKEN', ''),
+                             owm_config).weather_manager()
+        self.geocoder = geopy.geocoders.Bing(
+            os.getenv('BING_MAPS_TOKEN'),
+            adapter_factory=geopy.adapters.RequestsAdapter)
+
+        self.quotas = {'owm': TokenBucket('OWM', OWM_CALLS_PER_MINUTE,
+                                          OWM_BURST),
+                       'bing': TokenBucket('Bing Maps', BING_CALLS_PER_MINUTE,
+                                           BING_BURST)}
+        self.degraded = 0
+
+        self.geocache = GeocodeCache()
+        self.obs_cache = TTLCache(ONECALL_CACHE_SIZE, ONECALL_MAX_AGE)
+        self.executor = ThreadPoolExecutor(max_workers=WEATHER_WORKERS,
+                                           thread_name_prefix='weather')
+        self.slots = threading.BoundedSemaphore(WEATHER_QUEUE_DEPTH)
+        self.inflight = {}
+        self.coalesced = 0
+        self.popularity = Counter()
+        self.refreshing = set()
+        self.revalidations = set()
+        self.refreshes = 0
+        self.refresher.start()
+
+        self.subscriptions = Subscriptions()
+        self.deliveries = set()
+        self.last_minute = None
+        self.scheduler.start()
+
+    def cog_unload(self):
+        self.refresher.cancel()
+        self.scheduler.cancel()
+
+        for task in self.deliveries | self.revalidations:
+            task.cancel()
+
+        self.subscriptions.close()
+        self.executor.shutdown(wait=False)
+        self.geocache.close()
+        self.mgr.http_client.http.close()
+        self.mgr.one_call_http_client.http.close()
+        self.geocoder.adapter.session.close()
+
+    async def run_blocking(self, func, *args, **kwargs):
+        """
+        Accepts blocking function and its arguments.
+        Returns its result after running it in the weather thread pool.
+
+        Raises WeatherBusyError if WEATHER_QUEUE_DEPTH calls are pending.
+        Raises asyncio.TimeoutError after WEATHER_TIMEOUT seconds.
+        """
+        # slot is held until the call finishes, even if the caller gives up
+        if not self.slots.acquire(blocking=False):
+            raise WeatherBusyError
+
+        try:
+            future = self.executor.submit(func, *args, **kwargs)
+        except RuntimeError:
+            self.slots.release()
+            raise
+
+        future.add_done_callback(lambda f: self.slots.release())
+        return await asyncio.wait_for(asyncio.wrap_future(future),
+                                      WEATHER_TIMEOUT)
+
+    def stats(self):
+        """Returns list of weather service performance summaries."""
+        return [self.geocache.stats(),
+                self.obs_cache.stats('One Call cache'),
+                f"Coalesced lookups: {self.coalesced}.",
+                f"Background refreshes: {self.refreshes}.",
+                f"Subscriptions: {len(self.subscriptions)}.",
+                self.quotas['owm'].stats(),
+                self.quotas['bing'].stats(),
+                f"Served past max age: {self.degraded}."]
+
+    async def get_obs_loc(self, place=''):
+        """
+        Accepts place.
+        Returns tuple with Forecast and geopy Location.
+
+        Default place is Toronto, ON.
+        Concurrent lookups for the same place share one pending fetch, so
+        every caller gets the same result or error.
+        """
+        # default place is Toronto, ON
+        if not place.strip():
+            place = 'Toronto, ON'
+
+        key = normalize_place(place)
+        self.popularity[key] += 1
+        task = self.inflight.get(key)
+
+        if task:
+            self.coalesced += 1
+        else:
+            task = asyncio.ensure_future(self.fetch_obs_loc(place))
+            self.inflight[key] = task
+            task.add_done_callback(lambda t: self.inflight.pop(key, None))
+
+        # one impatient caller mustn't cancel the fetch for everyone else
+        return await asyncio.shield(task)
+
+    async def fetch_obs_loc(self, place):
+        """
+        Accepts place.
+        Returns tuple with Forecast and geopy Location.
+
+        Locations are served from the geocode cache when possible.
+        One Call data is cached per location and covers every forecast
+        period. Data older than ONECALL_TTL seconds is still served, up to
+        ONECALL_MAX_AGE seconds, while a refresh runs in the background.
+        Older data is served only when the OWM quota is exhausted.
+        """
+        l = await self.geocode(place)
+        key = location_key(l.latitude, l.longitude)
+        fc = self.obs_cache.get(key)
+
+        if not fc:
+            try:
+                fc = await self.one_call(l)
+            except QuotaExceededError:
+                # degrade to whatever data is left, however old
+                fc = self.obs_cache.peek(key)
+
+                if not fc:
+                    raise
+
+                self.degraded += 1
+        elif self.obs_cache.age(key) >= ONECALL_TTL:
+            # serve stale data now and revalidate behind the scenes
+            task = asyncio.ensure_future(self.revalidate(l))
+            self.revalidations.add(task)
+            task.add_done_callback(self.revalidations.discard)
+        
+        # return weather data and location
+        return fc, l
+
+    async def geocode(self, place, *, max_wait=QUOTA_MAX_WAIT, reserve=0):
+        """
+        Accepts place, seconds to wait for quota and quota to leave unused.
+        Returns geopy Location, or None if the place wasn't found.
+
+        Raises QuotaExceededError if no Bing Maps quota frees up in time.
+
+        Geocoding performed with Bing Maps Location API.
+        https://docs.microsoft.com/en-us/bingmaps/rest-services/locations/
+        """
+        l = self.geocache.get(place)
+
+        if not l:
+            await self.quotas['bing'].acquire(max_wait, reserve)
+
+            try:
+                l = await self.run_blocking(self.geocoder.geocode, place,
+                                            exactly_one=True, culture='en')
+            except geopy.exc.GeocoderRateLimited:
+                self.quotas['bing'].drain()
+                raise
+
+            if l:
+                self.geocache.put(place, l)
+
+        return l
+
+    async def one_call(self, l, *, max_wait=QUOTA_MAX_WAIT, reserve=0):
+        """
+        Accepts geopy Location, seconds to wait for quota and quota to leave
+        unused.
+        Returns Forecast parsed from freshly fetched One Call data, which is
+        also cached.
+
+        Raises QuotaExceededError if no OWM quota frees up in time.
+
+        Observation taken using OWM One Call API.
+        https://openweathermap.org/api/one-call-api
+        """
+        await self.quotas['owm'].acquire(max_wait, reserve)
+
+        try:
+            obs = await self.run_blocking(self.mgr.one_call, l.latitude,
+                                          l.longitude,
+                                          exclude=ONECALL_EXCLUDE)
+        except pyowm.commons.exceptions.APIRequestError as e:
+            # OWM reports its per-minute cap as a generic request error
+            if '429' in str(e):
+                self.quotas['owm'].drain()
+            raise
+        fc = Forecast(obs)
+        self.obs_cache.put(location_key(l.latitude, l.longitude), fc)
+
+        return fc
+
+    async def revalidate(self, l):
+        """
+        Accepts geopy Location.
+        Refreshes its cached One Call data unless a refresh is underway.
+
+        Refreshes never wait for quota and leave QUOTA_RESERVE of the OWM
+        budget for user requests.
+        """
+        key = location_key(l.latitude, l.longitude)
+
+        if key in self.refreshing:
+            return
+
+        self.refreshing.add(key)
+        reserve = self.quotas['owm'].capacity * QUOTA_RESERVE
+
+        try:
+            await self.one_call(l, max_wait=0, reserve=reserve)
+            self.refreshes += 1
+        except QuotaExceededError:
+            pass
+        except Exception as e:
+            print(f"Weather refresh failed for {key}: {repr(e)}")
+        finally:
+            self.refreshing.discard(key)
+
+    @tasks.loop(seconds=WEATHER_REFRESH_INTERVAL)
+    async def refresher(self):
+        """
+        Keeps One Call data warm for the most requested places.
+        Request counts decay each cycle so the list follows recent demand.
+        """
+        hot = self.popularity.most_common(WEATHER_HOT_PLACES)
+
+        for place, count in hot:
+            reserve = self.quotas['bing'].capacity * QUOTA_RESERVE
+
+            try:
+                l = await self.geocode(place, max_wait=0, reserve=reserve)
+            except QuotaExceededError:
+                break
+            except Exception as e:
+                print(f"Weather refresh failed for '{place}': {repr(e)}")
+                continue
+
+            if not l:
+                continue
+
+            # refresh anything that would go stale before the next cycle
+            age = self.obs_cache.age(location_key(l.latitude, l.longitude))
+            
+            if age is None or age >= ONECALL_TTL - WEATHER_REFRESH_INTERVAL:
+                await self.revalidate(l)
+
+        for place in list(self.popularity):
+            self.popularity[place] //= 2
+
+            if not self.popularity[place]:
+                del self.popularity[place]
+
+    @tasks.loop(seconds=20)
+    async def scheduler(self):
+        """
+        Starts delivery of subscriptions due since the last check.
+        Each minute is handled once, even if the loop drifts.
+        """
+        now = datetime.now(pytz.utc).replace(second=0, microsecond=0)
+        minute = self.last_minute or now - timedelta(minutes=1)
+        self.last_minute = now
+
+        while minute < now:
+            minute += timedelta(minutes=1)
+            due = self.subscriptions.due(minute)
+
+            if due:
+                task = asyncio.ensure_future(self.deliver(due))
+                self.deliveries.add(task)
+                task.add_done_callback(self.deliveries.discard)
+
+    async def deliver(self, due):
+        """
+        Accepts list of due subscriptions.
+        Sends forecasts, fetching and rendering each embed once per place.
+
+        Sends are spaced out at SUBSCRIPTION_SEND_RATE messages per second.
+        Subscriptions for channels that no longer exist are removed.
+        """
+        groups = defaultdict(list)
+
+        for sub in due:
+            groups[normalize_place(sub.place)].append(sub)
+
+        for subs in groups.values():
+            try:
+                fc, loc = await self.get_obs_loc(subs[0].place)
+            except Exception as e:
+                print(f"Subscription fetch failed for '{subs[0].place}': "
+                      f"{repr(e)}")
+                continue
+
+            for sub in subs:
+                embed = fc.render(SUBSCRIPTION_PERIODS[sub.period][1], loc)
+
+                try:
+                    channel = (self.bot.get_channel(sub.channel)
+                               or await self.bot.fetch_channel(sub.channel))
+                    await channel.send(embed=embed)
+                except (discord.errors.NotFound, discord.errors.Forbidden):
+                    self.subscriptions.remove(sub.channel, sub.id)
+                except discord.errors.HTTPException as e:
+                    print(f"Subscription {sub.id} not delivered: {repr(e)}")
+
+                await asyncio.sleep(1 / SUBSCRIPTION_SEND_RATE)
+
+    async def subscribe(self, ctx, *args):
+        """
+        Subscribes channel to a forecast sent daily at a local time.
+        Accepts time as HH:MM, an optional period flag and place.
+
+        Time is local to the place. Default period is daily.
+        Requires Manage Channels permission in guilds.
+        """
+        if ctx.guild and not ctx.author.guild_permissions.manage_channels:
+            await ctx.message.add_reaction('\U0001F44E')
+            await ctx.send("You lack this authority.")
+            return
+
+        try:
+            at = datetime.strptime(args[0], '%H:%M').strftime('%H:%M')
+        except (IndexError, ValueError):
+            await ctx.message.add_reaction('\U0001F615')
+            await ctx.send("Need a time like `7:00`.")
+            return
+
+        args = args[1:]
+        period = '-7d'
+
+        if args and args[0] in ('-12h', '-hourly'):
+            period, args = '-12h', args[1:]
+        elif args and args[0] in ('-7d', '-daily'):
+            args = args[1:]
+
+        subs = self.subscriptions.for_channel(ctx.channel.id)
+
+        if len(subs) >= SUBSCRIPTION_LIMIT:
+            await ctx.message.add_reaction('\U0001F615')
+            await ctx.send("This channel has too many subscriptions.")
+            return
+
+        place = ' '.join(args).strip() or 'Toronto, ON'
+        fc, loc = await self.get_obs_loc(place)
+        sub = self.subscriptions.add(ctx.channel.id, place, period, at,
+                                     fc.timezone)
+        
+        name = SUBSCRIPTION_PERIODS[period][0]
+        
+        await ctx.send(f"Subscribed to the {name} forecast for "
+                       f"{location_name(loc)} at {at} ({fc.timezone}). "
+                       f"ID: {sub.id}.")
+
+    async def unsubscribe(self, ctx, sub_id=None):
+        """
+        Removes channel's subscription with given ID.
+        Removes all of the channel's subscriptions by default.
+
+        Requires Manage Channels permission in guilds.
+        """
+        if ctx.guild and not ctx.author.guild_permissions.manage_channels:
+            await ctx.message.add_reaction('\U0001F44E')
+            await ctx.send("You lack this authority.")
+            return
+
+        try:
+            sub_id = int(sub_id) if sub_id else None
+        except ValueError:
+            await ctx.message.add_reaction('\U0001F615')
+            await ctx.send("Invalid subscription ID.")
+            return
+
+        if self.subscriptions.remove(ctx.channel.id, sub_id):
+            await ctx.send("Unsubscribed.")
+        else:
+            await ctx.message.add_reaction('\U0001F615')
+            await ctx.send("No matching subscriptions.")
+
+    async def compare(self, ctx, *args):
+        """
+        Sends current conditions for several places in one embed.
+        Accepts places separated by semicolons.
+
+        Places are looked up concurrently, COMPARE_CONCURRENCY at a time.
+        """
+        places = [p.strip() for p in ' '.join(args).split(';') if p.strip()]
+
+        if len(places) < 2:
+            await ctx.message.add_reaction('\U0001F615')
+            await ctx.send("Need at least two places separated by `;`.")
+            return
+        elif len(places) > COMPARE_LIMIT:
+            await ctx.message.add_reaction('\U0001F615')
+            await ctx.send(f"Can compare at most {COMPARE_LIMIT} places.")
+            return
+
+        gate = asyncio.Semaphore(COMPARE_CONCURRENCY)
+
+        async def lookup(place):
+            async with gate:
+                return await self.get_obs_loc(place)
+
+        found = await asyncio.gather(*(lookup(p) for p in places),
+                                     return_exceptions=True)
+        errors = [r for r in found if isinstance(r, Exception)]
+
+        # let forecast report the problem if nothing could be looked up
+        if len(errors) == len(found):
+            raise errors[0]
+
+        results = [(place, None, None) if isinstance(r, Exception)
+                   else (place, *r) for place, r in zip(places, found)]
+
+        if errors:
+            await ctx.message.add_reaction('\u26A0')
+
+        await ctx.send(embed=comparison_embed(results))
+
+    async def list_subscriptions(self, ctx):
+        """Sends list of channel's subscriptions."""
+        subs = self.subscriptions.for_channel(ctx.channel.id)
+
+        if subs:
+            await ctx.send('\n'.join(
+                f"{sub.id}: {SUBSCRIPTION_PERIODS[sub.period][0]} forecast "
+                f"for {sub.place} at {sub.time} ({sub.timezone})"
+                for sub in sorted(subs)))
+        else:
+            await ctx.send("No subscriptions in this channel.")
+
+    @refresher.before_loop
+    @scheduler.before_loop
+    async def before_loop(self):
+        await self.bot.wait_until_ready()
     
     @commands.command(aliases=['fc'])
     async def forecast(self, ctx, *args):
@@ -356,21 +1224,28 @@ class Weather(commands.Cog):
 
             try:
                 if args[0] == '-current' or args[0] == '-now':
-                    obs, loc = await get_obs_loc(place,
-                                                 exclude='minutely,daily')
-                    await ctx.send(embed=current_weather_embed(obs, loc))
+                    fc, loc = await self.get_obs_loc(place)
+                    await ctx.send(embed=fc.render(current_weather_embed, loc))
                 elif args[0] == '-tmrw' or args[0] == '-tomorrow':
-                    obs, loc = await get_obs_loc(place,
-                                                 exclude='minutely,hourly')
-                    await ctx.send(embed=tomorrow_forecast_embed(obs, loc))
+                    fc, loc = await self.get_obs_loc(place)
+                    await ctx.send(
+                        embed=fc.render(tomorrow_forecast_embed, loc))
                 elif args[0] == '-7d' or args[0] == '-daily':
-                    obs, loc = await get_obs_loc(place,
-                                                 exclude='minutely,hourly')
-                    await ctx.send(embed=daily_forecast_embed(obs, loc)) 
+                    fc, loc = await self.get_obs_loc(place)
+                    await ctx.send(embed=fc.render(daily_forecast_embed, loc))
                 elif args[0] == '-12h' or args[0] == '-hourly':
-                    obs, loc = await get_obs_loc(place,
-                                                 exclude='minutely,daily')
-                    await ctx.send(embed=hourly_forecast_embed(obs, loc))
+                    fc, loc = await self.get_obs_loc(place)
+                    await ctx.send(embed=fc.render(hourly_forecast_embed, loc))
+                elif args[0] == '-compare' or args[0] == '-cmp':
+                    await self.compare(ctx, *args[1:])
+                elif args[0] == '-subscribe' or args[0] == '-sub':
+                    await self.subscribe(ctx, *args[1:])
+                elif args[0] == '-unsubscribe' or args[0] == '-unsub':
+                    await self.unsubscribe(ctx, *args[1:2])
+                elif args[0] == '-subscriptions' or args[0] == '-subs':
+                    await self.list_subscriptions(ctx)
+                elif args[0] == '-stats':
+                    await ctx.send('\n'.join(self.stats()))
                 else:
                     await self.forecast(ctx, '-7d', args[0], place)
             except geopy.exc.GeocoderAuthenticationFailure:
@@ -384,6 +1259,16 @@ class Weather(commands.Cog):
                 await ctx.message.add_reaction('\U0001F916');
                 await ctx.send("Couldn't get weather due to missing token.")
                 print("Search failed: Need a valid OWM token.")
+            except (QuotaExceededError, geopy.exc.GeocoderQuotaExceeded):
+                await ctx.message.add_reaction('\U0001F916');
+                await ctx.send("Weather quota used up. Try again in a minute.")
+            except WeatherBusyError:
+                await ctx.message.add_reaction('\U0001F916');
+                await ctx.send("Too many weather requests right now. "
+                               "Try again shortly.")
+            except asyncio.TimeoutError:
+                await ctx.message.add_reaction('\U0001F916');
+                await ctx.send("Weather service timed out.")
         else:
             await self.forecast(ctx, '-7d')
     
@@ -0,0 +1,192 @@
+# test_vc.py
+"""
+Tests for the VC cog's playback queue.
+
+Run from the repository root: python -m unittest discover tests
+"""
+import asyncio
+import gc
+import types
+import unittest
+
+from unittest import mock
+
+# discord.py tasks bind to the event loop current at import time
+loop = asyncio.new_event_loop()
+asyncio.set_event_loop(loop)
+
+import discord
+import cogs.vc as vc
+
+class ToneSource(discord.AudioSource):
+    """PCM source of constant frames that records whether it was cleaned up."""
+    def __init__(self, sample=1000):
+        self.frame = sample.to_bytes(2, 'little', signed=True) \
+            * (discord.opus.Encoder.FRAME_SIZE // 2)
+        self.closed = False
+
+    def read(self):
+        return b'' if self.closed else self.frame
+
+    def cleanup(self):
+        self.closed = True
+
+class ToneTrack(vc.Track):
+    """Track opening a ToneSource."""
+    def __init__(self, title, sample=1000):
+        super().__init__(title)
+        self.sample = sample
+
+    async def open(self, pcm):
+        return ToneSource(self.sample)
+
+class OpusSource(discord.AudioSource):
+    """Opus source of silent packets that counts frames read."""
+    def __init__(self):
+        self.frames = 0
+
+    def read(self):
+        self.frames += 1
+        return b'\xf8\xff\xfe'
+
+    def is_opus(self):
+        return True
+
+class OpusTrack(ToneTrack):
+    """Track playing as Opus until it's reopened as PCM."""
+    async def open(self, pcm):
+        return await super().open(pcm) if pcm else OpusSource()
+
+    def reopen(self, offset):
+        return ToneSource(self.sample)
+
+class SlowTrack(ToneTrack):
+    """ToneTrack that takes until its gate is set to open."""
+    def __init__(self, title):
+        super().__init__(title)
+        self.gate = asyncio.Event()
+
+    async def open(self, pcm):
+        await self.gate.wait()
+        return await super().open(pcm)
+
+class Encoder(discord.opus.Encoder):
+    """Encoder that skips loading libopus; only its existence is checked."""
+    def __init__(self):
+        pass
+
+class Voice:
+    """
+    Voice client stand-in holding whatever source is playing.
+    Refuses to play over another source and only makes an encoder for
+    sources that start as PCM, like discord.py.
+    """
+    def __init__(self):
+        self.source = None
+        self.encoder = None
+
+    def is_connected(self):
+        return True
+
+    def is_playing(self):
+        return self.source is not None
+
+    def is_paused(self):
+        return False
+
+    def play(self, source, after=None):
+        if self.source is not None:
+            raise discord.ClientException('Already playing audio.')
+
+        if self.encoder is None and not source.is_opus():
+            self.encoder = discord.opus.Encoder()
+
+        self.source = source
+
+    def stop(self):
+        self.source = None
+
+class PlayerTest(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(discord.opus, 'Encoder', Encoder)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.guild = types.SimpleNamespace(voice_client=Voice(), name='test')
+        self.player = vc.GuildPlayer(types.SimpleNamespace(loop=loop),
+                                     self.guild)
+
+class QueueTest(PlayerTest):
+    def test_add_while_next_track_opens_queues_behind_it(self):
+        slow = SlowTrack('slow')
+        loop.run_until_complete(self.player.add(ToneTrack('first')))
+        loop.run_until_complete(self.player.add(slow))
+
+        # first ends and the after callback waits on slow to open
+        self.guild.voice_client.stop()
+        advancing = loop.create_task(self.player.advance())
+        loop.run_until_complete(asyncio.sleep(0))
+        position = loop.run_until_complete(
+            asyncio.wait_for(self.player.add(ToneTrack('last')), 1))
+        slow.gate.set()
+        loop.run_until_complete(advancing)
+
+        self.assertEqual(position, 1)
+        self.assertIs(self.player.current, slow)
+        self.assertEqual([t.title for t in self.player.queue], ['last'])
+
+class VolumeTest(PlayerTest):
+    def test_volume_switches_opus_track_to_pcm_with_encoder(self):
+        loop.run_until_complete(self.player.add(OpusTrack('track')))
+        voice = self.guild.voice_client
+        self.assertIsNone(voice.encoder)
+
+        self.player.set_volume(0.5)
+
+        self.assertIsInstance(voice.source.source,
+                              discord.PCMVolumeTransformer)
+        self.assertIsNotNone(voice.encoder)
+
+class OverlayTest(PlayerTest):
+    def test_overlay_keeps_pcm_track_playing(self):
+        self.player.set_volume(0.5) # plays the track as PCM
+        loop.run_until_complete(self.player.add(ToneTrack('track')))
+        meter = self.guild.voice_client.source
+        transformer = meter.source
+        source = transformer.original
+        self.assertIsInstance(transformer, discord.PCMVolumeTransformer)
+
+        loop.run_until_complete(self.player.overlay(ToneTrack('over', 2000),
+                                                    1.0))
+        del transformer
+        gc.collect()
+
+        self.assertIsInstance(meter.source, vc.Mixer)
+        self.assertFalse(source.closed)
+        self.assertEqual(meter.read(), ToneSource(1500).frame)
+
+    def test_volume_while_mixing_skips_track_gain(self):
+        track = ToneTrack('track')
+        track.gain = 2.0
+        self.player.set_volume(0.5)
+        loop.run_until_complete(self.player.add(track))
+        loop.run_until_complete(self.player.overlay(ToneTrack('over'), 1.0))
+        meter = self.guild.voice_client.source
+
+        self.player.set_volume(0.25)
+
+        self.assertEqual(meter.source.volume, 0.25)
+        self.assertEqual(meter.read(), ToneSource(750).frame)
+
+    def test_overlay_switches_opus_track_to_pcm_with_encoder(self):
+        loop.run_until_complete(self.player.add(OpusTrack('track')))
+        voice = self.guild.voice_client
+        self.assertIsNone(voice.encoder)
+
+        loop.run_until_complete(self.player.overlay(ToneTrack('over'), 1.0))
+
+        self.assertIsInstance(voice.source.source, vc.Mixer)
+        self.assertIsNotNone(voice.encoder)
+        self.assertEqual(voice.source.read(), ToneSource(2000).frame)
+
+if __name__ == '__main__':
+    unittest.main()